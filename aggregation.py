@@ -0,0 +1,90 @@
+"""
+Aggregation of Readings into the date intervals used by the Summary services.
+
+Every interval for a request is computed in a single grouped query. Each Reading is assigned to its interval in the
+database using `width_bucket` against the interval boundaries, or with `date_trunc` when the intervals are whole days,
+months, quarters or years, and the aggregates are calculated per interval.
+
+When every boundary falls on the start of a bucket of a granularity maintained in the reading_rollup table, the
+intervals are calculated from the Reading Rollups of that granularity instead of the Readings.
+"""
+# stdlib
+from datetime import datetime
+from typing import List, Optional
+# libs
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import DateTimeField, Func, IntegerField, QuerySet, Value
+from django.db.models.functions import Cast
+# local
+from plot.bucket_calendar import BucketCalendar
+from plot.models.reading_rollup import GRANULARITIES, get_bucket_start
+
+__all__ = [
+    'get_bucket_aggregates',
+    'get_rollup_granularity',
+    'WidthBucket',
+]
+
+
+class WidthBucket(Func):
+    """
+    Returns the index of the bucket the expression falls into, given a sorted array of bucket boundaries.
+    Index 0 is returned for values below the first boundary and len(boundaries) for values above the last.
+    """
+    function = 'width_bucket'
+    output_field = IntegerField()
+
+    def __init__(self, expression: str, boundaries: List[datetime], **extra):
+        array_field = ArrayField(DateTimeField())
+        thresholds = Cast(Value(boundaries, output_field=array_field), output_field=array_field)
+        super().__init__(expression, thresholds, **extra)
+
+
+def get_rollup_granularity(calendar: BucketCalendar) -> Optional[str]:
+    """
+    Find the coarsest granularity of Reading Rollups that the intervals of the calendar can be calculated from
+    :param calendar: The intervals being summarised
+    :return: The granularity that every boundary is the start of a bucket of, or None if there is none
+    """
+    for granularity in reversed(GRANULARITIES):
+        if all(get_bucket_start(boundary, granularity) == boundary for boundary in calendar.boundaries):
+            return granularity
+    return None
+
+
+def get_bucket_aggregates(
+        readings: QuerySet,
+        calendar: BucketCalendar,
+        *fields: str,
+        datetime_field: str = 'datetime_taken',
+        **aggregates,
+) -> QuerySet:
+    """
+    Aggregate the supplied Readings for every interval of the calendar, in a single query
+    :param readings: The Readings, or Reading Rollups, to be aggregated
+    :param calendar: The intervals being summarised
+    :param fields: Any fields, other than the bucket, to group the Readings by
+    :param datetime_field: The field that places a record in an interval, bucket_start for Reading Rollups
+    :param aggregates: The aggregates to be calculated for each group, e.g. value=Max('value')
+    :return: A values QuerySet with a `bucket` key, which `calendar.get_bucket` converts to the index into
+             `calendar.dates` of the date that closes the interval
+    """
+    boundaries = list(calendar.boundaries)
+    if calendar.trunc_kind is not None:
+        bucket = calendar.get_trunc(datetime_field)
+    else:
+        bucket = WidthBucket(datetime_field, boundaries)
+    return readings.filter(**{
+        f'{datetime_field}__gte': boundaries[0],
+        f'{datetime_field}__lt': boundaries[-1],
+    }).annotate(
+        bucket=bucket,
+    ).values(
+        'bucket',
+        *fields,
+    ).annotate(
+        **aggregates,
+    ).order_by(
+        'bucket',
+        *fields,
+    )
@@ -0,0 +1,145 @@
+"""
+Aggregation of Readings into the date intervals used by the Summary services, in Python with NumPy.
+
+An alternative to `plot.aggregation.get_bucket_aggregates` for Readings, selected by the PLOT_SUMMARY_AGGREGATION
+setting. The datetime_taken and value of the Readings are fetched in a single query as integers, microseconds since the
+epoch and hundredths of the value, and loaded into arrays. Each Reading is assigned to its interval with
+`numpy.searchsorted` against the interval boundaries, and the aggregates of every interval are calculated with
+`reduceat`. As the values are summed as integers, the results are exact and are returned as the same Decimals the
+database would return.
+"""
+# stdlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal, localcontext, ROUND_HALF_UP
+from typing import Any, Dict, List, Tuple
+# libs
+import numpy
+from django.db.models import BigIntegerField, F, Func, QuerySet
+from django.db.models.functions import Cast
+# local
+from plot.bucket_calendar import BucketCalendar
+
+__all__ = [
+    'AGGREGATES',
+    'get_bucket_aggregates_numpy',
+]
+
+
+AGGREGATES = ('avg', 'count', 'max', 'min')
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class EpochMicroseconds(Func):
+    """
+    Returns the number of microseconds between the Unix epoch and a datetime
+    """
+    template = '(EXTRACT(EPOCH FROM %(expressions)s) * 1000000)::bigint'
+    output_field = BigIntegerField()
+
+
+def get_base_digits(value: int, scale: int) -> Tuple[int, int]:
+    """
+    Find the weight and the value of the first digit of a number in base 10000, as PostgreSQL stores numerics
+    :param value: The number as an integer, multiplied by 10 ** scale
+    :param scale: The number of decimal places of the number
+    """
+    value = abs(value)
+    if value == 0:
+        return 0, 0
+    exponent = len(str(value)) - 1 - scale
+    weight = exponent // 4
+    shift = -scale - 4 * weight
+    if shift >= 0:
+        return weight, value * 10 ** shift
+    return weight, value // 10 ** -shift
+
+
+def get_numeric_avg(total: int, count: int) -> Decimal:
+    """
+    Divide a sum of values with 2 decimal places by a count, rounding to the same number of decimal places as the avg
+    function of PostgreSQL does for numeric values
+    :param total: The sum of the values, in hundredths
+    :param count: The number of values
+    """
+    weight1, first1 = get_base_digits(total, 2)
+    weight2, first2 = get_base_digits(count, 0)
+    weight = weight1 - weight2
+    if first1 <= first2:
+        weight -= 1
+    scale = max(16 - weight * 4, 2)
+    with localcontext() as context:
+        context.prec = scale + 40
+        return (Decimal(total).scaleb(-2) / Decimal(count)).quantize(Decimal(1).scaleb(-scale), ROUND_HALF_UP)
+
+
+def get_bucket_aggregates_numpy(
+        readings: QuerySet,
+        calendar: BucketCalendar,
+        *fields: str,
+        **aggregates: str,
+) -> List[Dict]:
+    """
+    Aggregate the supplied Readings for every interval in the date list with NumPy
+    :param readings: The Readings to be aggregated
+    :param calendar: The intervals being summarised
+    :param fields: Any integer fields, other than the bucket, to group the Readings by, e.g. source_id
+    :param aggregates: The aggregate of the value of the Readings to be calculated for each group, as one of AGGREGATES,
+                       e.g. value='max'
+    :return: A list of dictionaries ordered by bucket and fields, the same as `plot.aggregation.get_bucket_aggregates`
+    """
+    boundaries = calendar.boundaries
+    rows = readings.filter(
+        datetime_taken__gte=boundaries[0],
+        datetime_taken__lt=boundaries[-1],
+    ).annotate(
+        epoch_microseconds=EpochMicroseconds('datetime_taken'),
+        hundredths=Cast(F('value') * 100, output_field=BigIntegerField()),
+    ).values_list(
+        'epoch_microseconds',
+        'hundredths',
+        *fields,
+    ).order_by()
+    rows = numpy.array(list(rows), dtype=numpy.int64).reshape(-1, 2 + len(fields))
+    if len(rows) == 0:
+        return []
+
+    # Index i is boundaries[i - 1] <= datetime_taken < boundaries[i], as width_bucket calculates it
+    edges = numpy.array([(boundary - EPOCH) // timedelta(microseconds=1) for boundary in boundaries])
+    buckets = numpy.searchsorted(edges, rows[:, 0], side='right')
+    if len(fields) > 0:
+        groups, group_index = numpy.unique(rows[:, 2:], axis=0, return_inverse=True)
+        group_index = group_index.reshape(-1)
+    else:
+        groups = numpy.empty((1, 0), dtype=numpy.int64)
+        group_index = numpy.zeros(len(rows), dtype=numpy.int64)
+
+    # Sort the Readings by group and bucket, and find where each (group, bucket) starts
+    keys = group_index * len(edges) + buckets
+    order = numpy.argsort(keys, kind='stable')
+    keys = keys[order]
+    values = rows[order, 1]
+    starts = numpy.flatnonzero(numpy.r_[True, keys[1:] != keys[:-1]])
+    counts = numpy.diff(numpy.r_[starts, len(keys)])
+    calculated = {'count': counts}
+    if 'avg' in aggregates.values():
+        calculated['avg'] = numpy.add.reduceat(values, starts)
+    if 'max' in aggregates.values():
+        calculated['max'] = numpy.maximum.reduceat(values, starts)
+    if 'min' in aggregates.values():
+        calculated['min'] = numpy.minimum.reduceat(values, starts)
+
+    results = []
+    for i, start in enumerate(starts):
+        group, bucket = divmod(int(keys[start]), len(edges))
+        result: Dict[str, Any] = {'bucket': bucket}
+        result.update(zip(fields, (int(field) for field in groups[group])))
+        for name, aggregate in aggregates.items():
+            if aggregate == 'count':
+                result[name] = int(counts[i])
+            elif aggregate == 'avg':
+                result[name] = get_numeric_avg(int(calculated['avg'][i]), int(counts[i]))
+            else:
+                result[name] = Decimal(int(calculated[aggregate][i])).scaleb(-2)
+        results.append(result)
+    # Ordered by bucket and then fields, as the database orders them
+    return sorted(results, key=lambda result: (result['bucket'], *(result[field] for field in fields)))
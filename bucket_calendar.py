@@ -0,0 +1,233 @@
+"""
+The intervals of the Summary services, as a calendar of buckets.
+
+A calendar is built once per start date, end date, interval and time zone and then reused, as the same ranges are
+requested repeatedly. It holds the dates closing each interval, as returned in the responses, and the boundaries of the
+buckets as timezone aware datetimes, so they can be used in filters and aggregations without being parsed again.
+
+Intervals of days, months, quarters and years close on a date and end at the start of the next day in the current time
+zone. Intervals of minutes and hours start at the start date, to the minute, and are a fixed length of time, so they
+are stepped in UTC and close on the datetime that ends them.
+
+When every bucket lies within a single minute, hour, day, month, quarter or year, the bucket of a Reading is also given
+by truncating its datetime_taken to that unit with `date_trunc`, which the aggregations group by instead of
+`width_bucket`.
+"""
+# stdlib
+import calendar
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from math import ceil
+from typing import List, Optional, Tuple, Union
+# libs
+from django.db.models import Expression
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+__all__ = [
+    'BucketCalendar',
+    'get_bucket_calendar',
+    'get_bucket_count',
+    'INTERVAL',
+    'PERIODS',
+]
+
+
+# An interval is a frequency followed by a period, e.g. 15min or 1d
+INTERVAL = re.compile(r'(\d+)([A-Za-z]*)')
+# The periods an interval can be given in, and the unit of date_trunc each one can correspond to
+PERIODS = {
+    'min': 'minute',
+    'h': 'hour',
+    'd': 'day',
+    'm': 'month',
+    'q': 'quarter',
+    'y': 'year',
+}
+# The length of the periods shorter than a day
+SUB_DAY_PERIODS = {
+    'min': timedelta(minutes=1),
+    'h': timedelta(hours=1),
+}
+
+
+@dataclass(frozen=True)
+class BucketCalendar:
+    """
+    The intervals of a Summary. Bucket `i`, for i from 1 to len(dates) - 1, is the interval closed by dates[i] and
+    contains the Readings where boundaries[i - 1] <= datetime_taken < boundaries[i]
+    """
+    # The dates closing each interval, as returned by the Summary services. The first date is the day before the start,
+    # or the start itself for intervals of minutes and hours
+    dates: Tuple[str, ...]
+    # The start of the day after each date, in the current time zone, or each date itself for minutes and hours
+    boundaries: Tuple[datetime, ...]
+    # The unit of date_trunc that gives the bucket of a datetime, if there is one
+    trunc_kind: Optional[str]
+
+    def get_bucket(self, value: Union[int, datetime]) -> int:
+        """
+        The index of the bucket of a value grouped by in `get_bucket_aggregates`, either the index itself or the
+        truncated datetime. The first bucket may start part way through a unit, so its datetimes are truncated to
+        before the first boundary.
+        """
+        if isinstance(value, int):
+            return value
+        return max(bisect_right(self.boundaries, value), 1)
+
+    def get_trunc(self, expression: Union[str, Expression]) -> Trunc:
+        """
+        The date_trunc expression that groups datetimes by the buckets of the calendar
+        """
+        return Trunc(expression, self.trunc_kind, tzinfo=self.boundaries[0].tzinfo)
+
+
+def truncate(dt: datetime, kind: str) -> datetime:
+    """
+    Truncate the datetime to the start of the minute, hour, day, month, quarter or year it is in, as date_trunc does
+    """
+    dt = dt.replace(second=0, microsecond=0)
+    if kind == 'minute':
+        return dt
+    dt = dt.replace(minute=0)
+    if kind == 'hour':
+        return dt
+    dt = dt.replace(hour=0)
+    if kind == 'month':
+        dt = dt.replace(day=1)
+    elif kind == 'quarter':
+        dt = dt.replace(month=dt.month - (dt.month - 1) % 3, day=1)
+    elif kind == 'year':
+        dt = dt.replace(month=1, day=1)
+    return dt
+
+
+def get_trunc_kind(boundaries: List[datetime], period: str) -> Optional[str]:
+    """
+    Find the unit of date_trunc the buckets correspond to. Every boundary between two buckets must be the start of a
+    unit, and every bucket must end in the unit it starts in.
+    """
+    kind = PERIODS[period]
+    for i in range(1, len(boundaries)):
+        start = truncate(boundaries[i - 1], kind)
+        if i > 1 and start != boundaries[i - 1]:
+            return None
+        if truncate(boundaries[i] - timedelta(microseconds=1), kind) != start:
+            return None
+    return kind
+
+
+def add_months(dt: datetime, months: int) -> datetime:
+    """
+    Move the datetime forward a number of months, to the last day of that month
+    """
+    index = dt.year * 12 + dt.month - 1 + months
+    year, month = divmod(index, 12)
+    return dt.replace(year=year, month=month + 1, day=calendar.monthrange(year, month + 1)[1])
+
+
+def build_sub_day_boundaries(start_date: datetime, end_date: datetime, step: timedelta) -> List[datetime]:
+    """
+    Step from the start, to the minute, in UTC until the end is passed, so every bucket is the same length of time
+    """
+    tzinfo = timezone.get_current_timezone()
+    if timezone.is_naive(start_date):
+        start_date = timezone.make_aware(start_date, tzinfo)
+    if timezone.is_naive(end_date):
+        end_date = timezone.make_aware(end_date, tzinfo)
+    boundaries = [start_date.astimezone(dt_timezone.utc).replace(second=0, microsecond=0)]
+    while boundaries[-1] < end_date:
+        boundaries.append(boundaries[-1] + step)
+    return boundaries
+
+
+@lru_cache(maxsize=1024)
+def build_bucket_calendar(start: str, end: str, frequency: int, period: str, time_zone: str) -> BucketCalendar:
+    """
+    Build the calendar for a range in a time zone. Cached, as the calendars of the ranges requested are reused.
+    The range is keyed by the ISO format of its datetimes, as datetimes in different time zones are equal when they are
+    the same instant, but can be on different dates.
+    """
+    start_date = datetime.fromisoformat(start)
+    end_date = datetime.fromisoformat(end)
+    if period in SUB_DAY_PERIODS:
+        boundaries = build_sub_day_boundaries(start_date, end_date, SUB_DAY_PERIODS[period] * frequency)
+        tzinfo = timezone.get_current_timezone()
+        return BucketCalendar(
+            dates=tuple(timezone.localtime(boundary, tzinfo).isoformat() for boundary in boundaries),
+            boundaries=tuple(boundaries),
+            trunc_kind=get_trunc_kind(boundaries, period),
+        )
+
+    # As filter uses `gt`, use previous day as first in the list
+    curr_date = start_date - timedelta(days=1)
+    dates = []
+    while curr_date < end_date:
+        dates.append(curr_date.date())
+        if period == 'd':
+            curr_date += timedelta(days=frequency)
+        elif period == 'm':
+            curr_date = add_months(curr_date, frequency)
+        elif period == 'q':
+            curr_date = add_months(curr_date, 3 * frequency)
+        else:
+            curr_date = curr_date.replace(year=curr_date.year + frequency, month=12, day=31)
+    dates.append(end_date.date())
+
+    tzinfo = timezone.get_current_timezone()
+    boundaries = [
+        timezone.make_aware(datetime(date.year, date.month, date.day) + timedelta(days=1), tzinfo)
+        for date in dates
+    ]
+    return BucketCalendar(
+        dates=tuple(date.isoformat() for date in dates),
+        boundaries=tuple(boundaries),
+        trunc_kind=get_trunc_kind(boundaries, period),
+    )
+
+
+def get_bucket_calendar(start_date: datetime, end_date: datetime, frequency: int, period: str) -> BucketCalendar:
+    """
+    Get the calendar of the intervals of a Summary, in the current time zone
+    :param start_date: The first date to be summarised
+    :param end_date: The last date to be summarised
+    :param frequency: The number of periods in each interval
+    :param period: The period of the intervals, one of PERIODS
+    """
+    return build_bucket_calendar(
+        start_date.isoformat(),
+        end_date.isoformat(),
+        frequency,
+        period,
+        timezone.get_current_timezone_name(),
+    )
+
+
+def get_bucket_count(start_date: datetime, end_date: datetime, frequency: int, period: str) -> int:
+    """
+    Estimate the number of intervals in a range without building the calendar, so that requests for too many intervals
+    can be rejected first. The estimate is never less than the number of intervals the calendar has.
+    :param start_date: The first date to be summarised
+    :param end_date: The last date to be summarised
+    :param frequency: The number of periods in each interval
+    :param period: The period of the intervals, one of PERIODS
+    """
+    if period in SUB_DAY_PERIODS:
+        if timezone.is_naive(start_date) != timezone.is_naive(end_date):
+            tzinfo = timezone.get_current_timezone()
+            start_date = timezone.make_aware(start_date, tzinfo) if timezone.is_naive(start_date) else start_date
+            end_date = timezone.make_aware(end_date, tzinfo) if timezone.is_naive(end_date) else end_date
+        # One more than the length of the range, as the start is truncated to the minute
+        length = end_date - start_date + timedelta(minutes=1)
+        return max(ceil(length / (SUB_DAY_PERIODS[period] * frequency)), 0)
+    if period == 'd':
+        return (end_date.date() - start_date.date()).days // frequency + 2
+    months = (end_date.year - start_date.year) * 12 + end_date.month - start_date.month
+    if period == 'm':
+        return months // frequency + 2
+    if period == 'q':
+        return months // (3 * frequency) + 2
+    return (end_date.year - start_date.year) // frequency + 2
@@ -0,0 +1,168 @@
+"""
+Loading of large numbers of Readings using PostgreSQL COPY.
+
+Rows are streamed into a temporary staging table with COPY, and then merged into the reading table with a single
+INSERT ... SELECT. The merge applies the same rules as the create Reading method:
+- The Source must exist, and belong to the Address when one is given.
+- The Reading cannot be in the future.
+- Only one Reading can exist for a Source at a given datetime_taken. Rows that repeat an existing Reading, or another
+  row in the same load, are skipped using the reading_source_datetime_taken_unique constraint.
+"""
+# stdlib
+import csv
+import io
+import json
+from typing import IO, Iterable, Iterator, Optional, Tuple
+# libs
+from django.db import connections, router, transaction
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.utils import timezone
+# local
+from plot.models import Reading, ReadingRollup, SourceLatestReading
+from plot.summary_cache import invalidate_summary_days
+
+__all__ = [
+    'copy_readings',
+    'FORMATS',
+]
+
+
+FORMATS = ('csv', 'ndjson')
+CHUNK_SIZE = 64 * 1024
+
+CREATE_STAGING_SQL = """
+CREATE TEMPORARY TABLE reading_staging (
+    source_id bigint NOT NULL,
+    datetime_taken timestamp with time zone NOT NULL,
+    value numeric(10, 2) NOT NULL
+) ON COMMIT DROP
+"""
+COPY_SQL = 'COPY reading_staging (source_id, datetime_taken, value) FROM STDIN WITH (FORMAT csv, HEADER {header})'
+MERGE_SQL = """
+WITH inserted AS (
+    INSERT INTO reading (created, updated, extra, source_id, datetime_taken, value)
+    SELECT DISTINCT ON (staging.source_id, staging.datetime_taken)
+        now(), now(), '{{}}'::jsonb, staging.source_id, staging.datetime_taken, staging.value
+    FROM reading_staging staging
+    INNER JOIN source ON source.id = staging.source_id AND source.deleted IS NULL
+    INNER JOIN category ON category.id = source.category_id
+    WHERE staging.datetime_taken <= now()
+        {address_filter}
+    ORDER BY staging.source_id, staging.datetime_taken
+    ON CONFLICT (source_id, datetime_taken) WHERE deleted IS NULL DO NOTHING
+    RETURNING source_id, datetime_taken
+)
+SELECT
+    source_id,
+    count(*),
+    min(datetime_taken),
+    max(datetime_taken),
+    array_agg(DISTINCT date_trunc('day', datetime_taken AT TIME ZONE %s) AT TIME ZONE %s)
+FROM inserted
+GROUP BY source_id
+"""
+
+
+class IteratorStream(io.RawIOBase):
+    """
+    A read-only file object over an iterator of bytes, used to stream data to `copy_expert` with psycopg2
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.buffer = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while len(self.buffer) == 0:
+            try:
+                self.buffer = next(self.chunks)
+            except StopIteration:
+                return 0
+        size = min(len(b), len(self.buffer))
+        b[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+
+def read_csv(stream: IO[bytes]) -> Iterator[bytes]:
+    """
+    Pass the CSV through unchanged, in fixed size chunks
+    """
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+def read_ndjson(stream: IO[bytes]) -> Iterator[bytes]:
+    """
+    Convert each line of NDJSON into a CSV row of source_id, datetime_taken and value
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        reading = json.loads(line)
+        writer.writerow((reading['source_id'], reading['datetime_taken'], reading['value']))
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell() > 0:
+        yield buffer.getvalue().encode()
+
+
+def copy_readings(stream: IO[bytes], file_format: str, address_id: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Load Readings from a CSV or NDJSON stream into the reading table
+    :param stream: A binary stream of Readings. CSV requires a header row of source_id,datetime_taken,value. NDJSON
+                   requires an object with source_id, datetime_taken and value on each line.
+    :param file_format: One of FORMATS
+    :param address_id: When supplied, only Readings for Sources in a Category in this Address are loaded
+    :return: The number of rows received, and the number of Readings created
+    """
+    if file_format == 'csv':
+        chunks = read_csv(stream)
+    else:
+        chunks = read_ndjson(stream)
+
+    address_filter = ''
+    params = []
+    if address_id is not None:
+        address_filter = 'AND category.address_id = %s'
+        params.append(address_id)
+
+    using = router.db_for_write(Reading)
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute(CREATE_STAGING_SQL)
+        copy_sql = COPY_SQL.format(header='true' if file_format == 'csv' else 'false')
+        if is_psycopg3:
+            with cursor.copy(copy_sql) as copy:
+                for chunk in chunks:
+                    copy.write(chunk)
+        else:
+            cursor.copy_expert(copy_sql, IteratorStream(chunks), size=CHUNK_SIZE)
+        cursor.execute('SELECT count(*) FROM reading_staging')
+        received = cursor.fetchone()[0]
+        # The start of each day, in the current time zone, that Readings were created on for each Source
+        time_zone = timezone.get_current_timezone_name()
+        cursor.execute(MERGE_SQL.format(address_filter=address_filter), [*params, time_zone, time_zone])
+        created = 0
+        ranges = {}
+        days = {}
+        for source_id, count, earliest, latest, source_days in cursor.fetchall():
+            created += count
+            ranges[source_id] = (earliest, latest)
+            days[source_id] = source_days
+
+    if created > 0:
+        SourceLatestReading.objects.refresh(ranges.keys(), created=True)
+        ReadingRollup.objects.refresh(ranges)
+        invalidate_summary_days(days)
+    return received, created
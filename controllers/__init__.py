@@ -1,5 +1,10 @@
 from .category import CategoryListController, CategoryCreateController, CategoryUpdateController
-from .reading import ReadingListController, ReadingCreateController, ReadingUpdateController
+from .reading import (
+    ReadingListController,
+    ReadingCreateController,
+    ReadingBulkCreateController,
+    ReadingUpdateController,
+)
 from .source_group_summary import SourceGroupSummaryListController
 from .source import SourceListController, SourceCreateController, SourceUpdateController
 from .source_share import SourceShareListController, SourceShareCreateController
@@ -14,6 +19,7 @@ __all__ = [
     # Reading
     'ReadingListController',
     'ReadingCreateController',
+    'ReadingBulkCreateController',
     'ReadingUpdateController',
     # Source
     'SourceListController',
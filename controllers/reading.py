@@ -1,9 +1,11 @@
 # stdlib
-from typing import Optional
+from typing import Any, Dict, List, Optional
 # libs
 from cloudcix_rest.controllers import ControllerBase
-from datetime import datetime
+from datetime import datetime, timezone
 from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.db import connections, router
 # local
 from plot.models import Reading, Source
 
@@ -11,10 +13,24 @@ from plot.models import Reading, Source
 __all__ = [
     'ReadingListController',
     'ReadingCreateController',
+    'ReadingBulkCreateController',
     'ReadingUpdateController',
 ]
 
 
+# Finds the Readings that already exist for exactly the sent pairs of Source and datetime_taken. The range on
+# datetime_taken lets PostgreSQL skip the partitions the batch does not touch
+EXISTING_READINGS_SQL = """
+SELECT reading.source_id, reading.datetime_taken
+FROM reading
+JOIN unnest(%s::bigint[], %s::timestamptz[]) AS sent (source_id, datetime_taken)
+    ON reading.source_id = sent.source_id AND reading.datetime_taken = sent.datetime_taken
+WHERE reading.deleted IS NULL
+    AND reading.datetime_taken >= %s
+    AND reading.datetime_taken <= %s
+"""
+
+
 class ReadingListController(ControllerBase):
     """
     Validates User data used to list Reading records
@@ -81,14 +97,17 @@ class ReadingCreateController(ControllerBase):
         type: string
         """
         try:
-            datetime_taken = datetime.strptime(str(date_reading), '%Y-%m-%dT%H:%M:%S')
+            # Readings are sent in UTC
+            datetime_taken = datetime.strptime(str(date_reading), '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
         except (TypeError, ValueError):
             return 'plot_reading_create_104'
-        if datetime_taken > datetime.utcnow():
+        if datetime_taken > datetime.now(timezone.utc):
             return 'plot_reading_create_105'
         if 'source' not in self.cleaned_data:
             return None
         source = self.cleaned_data['source']
+        # A Reading created after this check is rejected by the reading_source_datetime_taken_unique constraint when
+        # the Reading is saved
         if Reading.objects.filter(source=source, datetime_taken=datetime_taken).exists():
             return 'plot_reading_create_106'
 
@@ -111,6 +130,115 @@ class ReadingCreateController(ControllerBase):
         return None
 
 
+class ReadingBulkCreateController(ControllerBase):
+    """
+    Validates user data used to create many Reading records in a single request.
+    Each row is validated with the same rules as ReadingCreateController, but Sources and existing Readings are checked
+    once for the whole batch. Rows that fail validation are reported in `row_errors` and do not stop the valid rows
+    from being created.
+    """
+    class Meta(ControllerBase.Meta):
+        """
+        Override some of the ControllerBase.Meta fields to make them more specific for this Controller
+        """
+        validation_order = (
+            'readings',
+        )
+
+    def validate_readings(self, readings: Optional[List[Dict[str, Any]]]) -> Optional[str]:
+        """
+        description: |
+            A list of Readings to create. Each item requires a "source_id", a "datetime_taken" in the format
+            yyyy-mm-ddThh:mm:ss and a "value" in decimal format. Rows that are invalid are returned in "errors" in the
+            response, using the error codes of the create Reading method.
+        type: array
+        items:
+            type: object
+        """
+        if not isinstance(readings, list) or len(readings) == 0:
+            return 'plot_reading_bulk_create_101'
+        if len(readings) > settings.PLOT_READING_BULK_LIMIT:
+            return 'plot_reading_bulk_create_102'
+
+        self.row_errors: Dict[int, str] = {}
+        rows = []
+        source_ids = set()
+        now = datetime.now(timezone.utc)
+        for index, reading in enumerate(readings):
+            if not isinstance(reading, dict):
+                self.row_errors[index] = 'plot_reading_bulk_create_103'
+                continue
+            source_id = reading.get('source_id', None)
+            if source_id is None:
+                self.row_errors[index] = 'plot_reading_create_101'
+                continue
+            try:
+                source_id = int(source_id)
+            except (ValueError, TypeError):
+                self.row_errors[index] = 'plot_reading_create_102'
+                continue
+            try:
+                datetime_taken = datetime.strptime(
+                    str(reading.get('datetime_taken', None)),
+                    '%Y-%m-%dT%H:%M:%S',
+                ).replace(tzinfo=timezone.utc)
+            except (TypeError, ValueError):
+                self.row_errors[index] = 'plot_reading_create_104'
+                continue
+            if datetime_taken > now:
+                self.row_errors[index] = 'plot_reading_create_105'
+                continue
+            value = reading.get('value', None)
+            if value is None:
+                self.row_errors[index] = 'plot_reading_create_107'
+                continue
+            try:
+                value = Decimal(str(value))
+            except (ValueError, TypeError, InvalidOperation):
+                self.row_errors[index] = 'plot_reading_create_108'
+                continue
+            source_ids.add(source_id)
+            rows.append((index, source_id, datetime_taken, value))
+
+        # Check the ownership of each distinct Source once
+        owned_source_ids = set(Source.objects.filter(
+            id__in=source_ids,
+            category__address_id=self.request.user.address['id'],
+        ).values_list('id', flat=True))
+
+        # Find the Readings that already exist for the batch in a single query
+        existing = set()
+        sent = [
+            (source_id, datetime_taken)
+            for _, source_id, datetime_taken, _ in rows
+            if source_id in owned_source_ids
+        ]
+        if len(sent) > 0:
+            with connections[router.db_for_read(Reading)].cursor() as cursor:
+                cursor.execute(EXISTING_READINGS_SQL, [
+                    [source_id for source_id, _ in sent],
+                    [datetime_taken for _, datetime_taken in sent],
+                    min(datetime_taken for _, datetime_taken in sent),
+                    max(datetime_taken for _, datetime_taken in sent),
+                ])
+                existing = set(cursor.fetchall())
+
+        instances = []
+        for index, source_id, datetime_taken, value in rows:
+            if source_id not in owned_source_ids:
+                self.row_errors[index] = 'plot_reading_create_103'
+                continue
+            if (source_id, datetime_taken) in existing:
+                self.row_errors[index] = 'plot_reading_create_106'
+                continue
+            # Also catches duplicates within the sent batch
+            existing.add((source_id, datetime_taken))
+            instances.append(Reading(source_id=source_id, datetime_taken=datetime_taken, value=value))
+
+        self.cleaned_data['readings'] = instances
+        return None
+
+
 class ReadingUpdateController(ControllerBase):
     """
     Validates user data used to create Reading records
@@ -132,10 +260,11 @@ class ReadingUpdateController(ControllerBase):
         type: string
         """
         try:
-            datetime_taken = datetime.strptime(str(date_reading), '%Y-%m-%dT%H:%M:%S')
+            # Readings are sent in UTC
+            datetime_taken = datetime.strptime(str(date_reading), '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
         except (TypeError, ValueError):
             return 'plot_reading_update_101'
-        if datetime_taken > datetime.utcnow():
+        if datetime_taken > datetime.now(timezone.utc):
             return 'plot_reading_update_102'
         if Reading.objects.filter(
             source=self._instance.source,
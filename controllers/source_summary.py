@@ -22,5 +22,6 @@ class SourceSummaryListController(ControllerBase):
         search_fields = {
             'end_date': (),
             'interval': (),
+            'points': (),
             'start_date': (),
         }
@@ -0,0 +1,103 @@
+"""
+Downsampling of the Readings of a Source for drawing in charts.
+
+Largest-Triangle-Three-Buckets keeps the first and last Readings and, from every bucket in between, the Reading that
+forms the largest triangle with the Reading kept from the previous bucket and the average of the next bucket, which
+preserves the shape of the series with far fewer points.
+
+The buckets divide the time range into equal lengths of time, rather than equal numbers of Readings, so the Readings can
+be bucketed as they are read from a server-side cursor, in a single pass and without counting them first. Only the
+bucket being selected from and the next bucket are held in memory.
+"""
+# stdlib
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Tuple
+# libs
+from django.conf import settings
+from django.db.models import QuerySet
+
+__all__ = [
+    'downsample_readings',
+]
+
+
+# A Reading as its position on the chart, seconds from the start of the range and value, then datetime_taken and value
+Point = Tuple[float, float, datetime, Decimal]
+
+
+def get_average(points: List[Point]) -> Tuple[float, float]:
+    """
+    The average position of the points in a bucket
+    """
+    return sum(point[0] for point in points) / len(points), sum(point[1] for point in points) / len(points)
+
+
+def select_point(bucket: List[Point], previous: Point, following: Tuple[float, float]) -> Point:
+    """
+    Select the point in the bucket that forms the largest triangle with the previous selected point and the next bucket
+    """
+    ax, ay = previous[0], previous[1]
+    cx, cy = following
+    # Twice the area of each triangle, which is enough to compare them
+    return max(bucket, key=lambda point: abs((ax - cx) * (point[1] - ay) - (ax - point[0]) * (cy - ay)))
+
+
+def downsample_readings(
+        readings: QuerySet,
+        start: datetime,
+        end: datetime,
+        points: int,
+) -> List[Tuple[datetime, Decimal]]:
+    """
+    Select at most a number of representative Readings taken in a range with Largest-Triangle-Three-Buckets
+    :param readings: The Readings of a Source
+    :param start: The start of the range
+    :param end: The end of the range, which is not included
+    :param points: The most Readings to be selected, at least 3
+    :return: The datetime_taken and value of the selected Readings, in order
+    """
+    rows = readings.filter(
+        datetime_taken__gte=start,
+        datetime_taken__lt=end,
+    ).order_by(
+        'datetime_taken',
+    ).values_list(
+        'datetime_taken',
+        'value',
+    ).iterator(chunk_size=settings.PLOT_READING_EXPORT_CHUNK_SIZE)
+    rows = (
+        ((datetime_taken - start).total_seconds(), float(value), datetime_taken, value)
+        for datetime_taken, value in rows
+    )
+
+    first = next(rows, None)
+    if first is None:
+        return []
+    selected = [first]
+    # Each Reading is only bucketed once a later Reading is read, as the last Reading is always kept
+    last = next(rows, None)
+    if last is None:
+        return [(first[2], first[3])]
+
+    buckets = points - 2
+    width = (end - start).total_seconds() / buckets
+    # The bucket being selected from, and the next bucket with Readings, which is complete when a later bucket begins
+    current: List[Point] = []
+    following: List[Point] = []
+    following_bucket = None
+    for row in rows:
+        bucket = min(int(last[0] / width), buckets - 1)
+        if bucket != following_bucket:
+            if len(current) > 0:
+                selected.append(select_point(current, selected[-1], get_average(following)))
+            current, following, following_bucket = following, [], bucket
+        following.append(last)
+        last = row
+
+    if len(current) > 0:
+        selected.append(select_point(current, selected[-1], get_average(following)))
+    if len(following) > 0:
+        selected.append(select_point(following, selected[-1], (last[0], last[1])))
+    selected.append(last)
+    return [(point[2], point[3]) for point in selected]
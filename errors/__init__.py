@@ -1,3 +1,4 @@
+from .alert import *
 from .category import *
 from .reading import *
 from .source import *
@@ -0,0 +1,9 @@
+"""
+Error codes for all the methods in Alert
+"""
+# List
+plot_alert_list_001 = (
+    'The "fields" parameter is invalid. "fields" must be a comma separated list of one or more of '
+    '"datetime_taken", "id", "source_id", "uri" and "value".'
+)
+plot_alert_list_002 = 'The "expand" parameter is invalid. "expand" must be "source".'
@@ -6,6 +6,9 @@ plot_category_list_001 = (
     'One or more of the sent search fields contains invalid values. Please check the sent parameters and ensure they '
     'match the required patterns.'
 )
+plot_category_list_002 = (
+    'The "count" parameter is invalid. "count" must be one of "capped", "estimate" or "exact".'
+)
 
 # Read
 plot_category_read_001 = 'The "pk" path parameter is invalid. "pk" must belong to a valid Category record.'
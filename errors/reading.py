@@ -6,6 +6,17 @@ plot_reading_list_001 = (
     'One or more of the sent search fields contains invalid values. Please check the sent parameters and ensure they '
     'match the required patterns.'
 )
+plot_reading_list_002 = (
+    'The "cursor" parameter is invalid. "cursor" must be empty or the "next" value from the previous page of Readings.'
+)
+plot_reading_list_003 = (
+    'The "fields" parameter is invalid. "fields" must be a comma separated list of one or more of '
+    '"datetime_taken", "id", "source_id", "uri" and "value".'
+)
+plot_reading_list_004 = 'The "expand" parameter is invalid. "expand" must be "source".'
+plot_reading_list_005 = (
+    'The "count" parameter is invalid. "count" must be one of "capped", "estimate" or "exact".'
+)
 
 # Create
 
@@ -28,6 +39,43 @@ plot_reading_create_107 = 'The "value" parameter is invalid. "value" is a requir
 plot_reading_create_108 = 'The "value" parameter is invalid. "value" must be a string in decimal format.'
 plot_reading_create_201 = 'You do not have permission to make this request. Your Member must be self-managed.'
 
+# Bulk Create
+plot_reading_bulk_create_101 = (
+    'The "readings" parameter is invalid. "readings" is required and must be a list of at least one Reading.'
+)
+plot_reading_bulk_create_102 = (
+    'The "readings" parameter is invalid. "readings" cannot contain more Readings than the limit of a single request.'
+)
+plot_reading_bulk_create_103 = (
+    'The sent Reading is invalid. Each item in "readings" must be an object with "source_id", "datetime_taken" and '
+    '"value".'
+)
+plot_reading_bulk_create_104 = (
+    'The "readings" parameter is invalid. A Reading with the same Source and "datetime_taken" as a sent Reading was '
+    'created at the same time. No Readings were created, send the request again.'
+)
+plot_reading_bulk_create_201 = 'You do not have permission to make this request. Your Member must be self-managed.'
+
+# Export
+plot_reading_export_001 = (
+    'The "file_format" parameter is invalid. "file_format" must be "arrow", "csv", "ndjson" or "parquet".'
+)
+plot_reading_export_002 = (
+    'One or more of the sent search fields contains invalid values. Please check the sent parameters and ensure they '
+    'match the required patterns.'
+)
+plot_reading_export_003 = 'The "value_type" parameter is invalid. "value_type" must be "decimal" or "float".'
+
+# Load
+plot_reading_load_001 = (
+    'The Content-Type of the request is invalid. Readings can be loaded from "text/csv" or "application/x-ndjson".'
+)
+plot_reading_load_002 = (
+    'The request body is invalid. Each row must have a "source_id" integer, a "datetime_taken" timestamp and a '
+    '"value" in decimal format. CSV must start with a header row of source_id,datetime_taken,value.'
+)
+plot_reading_load_201 = 'You do not have permission to make this request. Your Member must be self-managed.'
+
 # Read
 plot_reading_read_001 = 'The "pk" path parameter is invalid. "pk" must belong to a valid Reading record.'
 
@@ -11,13 +11,17 @@ plot_source_group_summary_list_003 = (
     'both be a date.'
 )
 plot_source_group_summary_list_004 = (
-    '"interval" is invlaid. "interval" is required as a search filter and should start with a number for the '
-    'frequency followed by a letter representing the period'
+    '"interval" is invlaid. "interval" is required as a search filter and should start with a number greater than 0 '
+    'for the frequency followed by letters representing the period'
 )
 plot_source_group_summary_list_005 = (
-    '"interval" is invlaid. "interval" should end with a letter representing the period. Supported periods are d(day), '
-    'm(month), q(quarter), y(year)'
+    '"interval" is invlaid. "interval" should end with letters representing the period. Supported periods are '
+    'min(minute), h(hour), d(day), m(month), q(quarter), y(year)'
 )
 plot_source_group_summary_list_006 = (
     '"accumulating" is invalid. "accumulating" is required as a search filter and must be a boolean.'
 )
+plot_source_group_summary_list_007 = (
+    '"interval" is invalid. The range from "start_date" to "end_date" contains too many intervals. Use a longer '
+    '"interval" or a shorter range.'
+)
@@ -6,6 +6,9 @@ plot_source_share_list_001 = (
     'One or more of the sent search fields contains invalid values. Please check the sent parameters and ensure they '
     'match the required patterns.'
 )
+plot_source_share_list_002 = (
+    'The "count" parameter is invalid. "count" must be one of "capped", "estimate" or "exact".'
+)
 
 # Create
 plot_source_share_create_101 = 'The "address_id" parameter is invalid. "address_id" is required.'
@@ -9,12 +9,19 @@ plot_source_summary_list_002 = (
     '"start_date" and/or "end_date" are  invalid. "start_date" and "end_date" must both be a date.'
 )
 plot_source_summary_list_003 = (
-    '"interval" is invlaid. "interval" should start with a number for the frequency followed by a letter representing '
-    'the period'
+    '"interval" is invlaid. "interval" should start with a number greater than 0 for the frequency followed by letters '
+    'representing the period'
 )
 plot_source_summary_list_004 = (
-    '"interval" is invlaid. "interval" should end with a letter representing the period. Supported periods are d(day), '
-    'm(month), q(quarter), y(year)'
+    '"interval" is invlaid. "interval" should end with letters representing the period. Supported periods are '
+    'min(minute), h(hour), d(day), m(month), q(quarter), y(year)'
+)
+plot_source_summary_list_005 = (
+    '"interval" is invalid. The range from "start_date" to "end_date" contains too many intervals. Use a longer '
+    '"interval" or a shorter range.'
+)
+plot_source_summary_list_006 = (
+    '"points" is invalid. "points" must be an integer from 3 up to the maximum number of intervals of a Summary.'
 )
 plot_source_summary_list_201 = (
     'You do not have permission to execute this method. You can only get a Source Summary for Sources in your Address'
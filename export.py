@@ -0,0 +1,168 @@
+"""
+Streaming export of large numbers of Readings.
+
+Readings are read through a server-side cursor in chunks of PLOT_READING_EXPORT_CHUNK_SIZE rows and written to the
+response as they are read, so memory use does not grow with the number of Readings exported. Each Reading is exported
+as source_id, datetime_taken and value.
+
+CSV and NDJSON are the format accepted by the load Reading method. Arrow IPC and Parquet are typed columnar formats,
+built one record batch per chunk of rows directly from the rows of the cursor, without creating Reading instances.
+"""
+# stdlib
+import csv
+import io
+import json
+from typing import Iterator, List, Tuple
+# libs
+import pyarrow
+import pyarrow.parquet
+from django.conf import settings
+from django.db.models import QuerySet
+
+__all__ = [
+    'CONTENT_TYPES',
+    'export_readings',
+    'VALUE_TYPES',
+]
+
+
+CONTENT_TYPES = {
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+COLUMNS = ('source_id', 'datetime_taken', 'value')
+# Rows are buffered up to this many bytes before being sent
+CHUNK_SIZE = 64 * 1024
+# The Arrow types the value column can be exported as. decimal matches the numeric(10, 2) column exactly
+VALUE_TYPES = {
+    'decimal': pyarrow.decimal128(10, 2),
+    'float': pyarrow.float64(),
+}
+
+
+class ChunkSink(io.RawIOBase):
+    """
+    A write-only file object that holds what is written to it until it is drained. The position reported by tell()
+    counts every byte written, as the Parquet writer records the offsets of row groups in the file footer.
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def get_schema(value_type: str) -> pyarrow.Schema:
+    """
+    The Arrow schema of exported Readings, with the value column as one of VALUE_TYPES
+    """
+    return pyarrow.schema([
+        pyarrow.field('source_id', pyarrow.int64(), nullable=False),
+        pyarrow.field('datetime_taken', pyarrow.timestamp('us', tz='UTC'), nullable=False),
+        pyarrow.field('value', VALUE_TYPES[value_type], nullable=False),
+    ])
+
+
+def get_batch(columns: Tuple[List, List, List], schema: pyarrow.Schema) -> pyarrow.RecordBatch:
+    """
+    Build a record batch from the source_id, datetime_taken and value columns of a chunk of rows
+    """
+    source_ids, datetimes_taken, values = columns
+    return pyarrow.RecordBatch.from_arrays(
+        [
+            pyarrow.array(source_ids, type=pyarrow.int64()),
+            pyarrow.array(datetimes_taken, type=pyarrow.timestamp('us', tz='UTC')),
+            # The values are read as Decimals, which Arrow only converts to a decimal type
+            pyarrow.array(values, type=VALUE_TYPES['decimal']).cast(schema.field('value').type),
+        ],
+        schema=schema,
+    )
+
+
+def get_batches(rows: Iterator[Tuple], schema: pyarrow.Schema) -> Iterator[pyarrow.RecordBatch]:
+    """
+    Group the rows of the cursor into record batches of PLOT_READING_EXPORT_CHUNK_SIZE rows
+    """
+    batch_size = settings.PLOT_READING_EXPORT_CHUNK_SIZE
+    columns = ([], [], [])
+    for row in rows:
+        for column, item in zip(columns, row):
+            column.append(item)
+        if len(columns[0]) == batch_size:
+            yield get_batch(columns, schema)
+            columns = ([], [], [])
+    if len(columns[0]) > 0:
+        yield get_batch(columns, schema)
+
+
+def export_columnar(rows: Iterator[Tuple], file_format: str, value_type: str) -> Iterator[bytes]:
+    """
+    Stream the rows as an Arrow IPC stream, or as a Parquet file with a row group for each record batch
+    """
+    schema = get_schema(value_type)
+    sink = ChunkSink()
+    if file_format == 'arrow':
+        writer = pyarrow.ipc.new_stream(sink, schema)
+    else:
+        writer = pyarrow.parquet.ParquetWriter(sink, schema)
+
+    for batch in get_batches(rows, schema):
+        writer.write_batch(batch)
+        yield sink.drain()
+    # Closing the writer writes the end of stream marker, or the Parquet footer
+    writer.close()
+    yield sink.drain()
+
+
+def export_text(rows: Iterator[Tuple], file_format: str) -> Iterator[bytes]:
+    """
+    Stream the rows as CSV with a header row, or as NDJSON with an object on each line
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if file_format == 'csv':
+        writer.writerow(COLUMNS)
+
+    for source_id, datetime_taken, value in rows:
+        if file_format == 'csv':
+            writer.writerow((source_id, datetime_taken.isoformat(), value))
+        else:
+            reading = {'source_id': source_id, 'datetime_taken': datetime_taken.isoformat(), 'value': str(value)}
+            buffer.write(f'{json.dumps(reading)}\n')
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell() > 0:
+        yield buffer.getvalue().encode()
+
+
+def export_readings(objs: QuerySet, file_format: str, value_type: str = 'decimal') -> Iterator[bytes]:
+    """
+    Stream the Readings in one of the formats of CONTENT_TYPES
+    :param objs: The Readings to export, in the order they are exported
+    :param file_format: One of the keys of CONTENT_TYPES
+    :param value_type: One of the keys of VALUE_TYPES, used for the value column of the arrow and parquet formats
+    """
+    rows = objs.values_list(*COLUMNS).iterator(chunk_size=settings.PLOT_READING_EXPORT_CHUNK_SIZE)
+    if file_format in ('arrow', 'parquet'):
+        return export_columnar(rows, file_format, value_type)
+    return export_text(rows, file_format)
@@ -0,0 +1,35 @@
+# stdlib
+from datetime import datetime
+# lib
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand
+# local
+from plot.partitions import create_partition, get_partition_name
+
+
+class Command(BaseCommand):
+    """
+    Create the monthly partitions of the reading table ahead of time
+    """
+    help = 'Create the monthly partitions of the reading table for the current month and the following months'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=3,
+            help='The number of months after the current month to create partitions for. Defaults to 3',
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+        Run the command by:
+            - Creating the partition for the current month and each of the following months, if it does not exist
+        """
+        month = datetime.utcnow().date().replace(day=1)
+        for i in range(kwargs['months'] + 1):
+            partition_month = month + relativedelta(months=i)
+            if create_partition(partition_month):
+                self.stdout.write(f'Created partition {get_partition_name(partition_month)}')
+
+        self.stdout.write(f'{month}: Completed creating partitions of the reading table')
@@ -0,0 +1,61 @@
+# stdlib
+from datetime import datetime, timedelta
+# lib
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+from django.db.models import Max
+# local
+from plot.aggregation import get_bucket_aggregates
+from plot.bucket_calendar import get_bucket_calendar
+from plot.models import Reading, Source
+
+
+class Command(BaseCommand):
+    """
+    Print the query plans of the hot queries on the reading table for a Source.
+    Run before and after a migration that changes the indexes of the reading table to compare the plans and timings.
+    """
+    help = 'Print EXPLAIN ANALYZE output for the hot queries on the reading table for a Source'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source_id', type=int, help='The Source to run the queries for')
+        parser.add_argument('--days', type=int, default=365, help='The number of days to summarise. Defaults to 365')
+
+    def handle(self, *args, **kwargs):
+        """
+        Run the command by:
+            - Building the querysets used by the Summary, Alert and create Reading methods for the Source
+            - Printing the plan and execution time of each one
+        """
+        try:
+            source = Source.objects.get(pk=kwargs['source_id'])
+        except Source.DoesNotExist:
+            raise CommandError(f'Source {kwargs["source_id"]} does not exist')
+
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=kwargs['days'])
+        latest = Reading.objects.filter(source=source).first()
+        queries = {
+            'source_summary': get_bucket_aggregates(
+                Reading.objects.filter(source=source),
+                get_bucket_calendar(start_date, end_date, 1, 'd'),
+                value=Max('value'),
+            ),
+            'alert_latest_reading': Reading.objects.filter(
+                source=source,
+            ).order_by('source_id', '-datetime_taken').distinct('source_id'),
+            'create_duplicate_check': Reading.objects.filter(
+                source=source,
+                datetime_taken=latest.datetime_taken if latest is not None else end_date,
+            ),
+        }
+
+        using = router.db_for_read(Reading)
+        with connections[using].cursor() as cursor:
+            for name, queryset in queries.items():
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+                self.stdout.write(f'-- {name}')
+                for row in cursor.fetchall():
+                    self.stdout.write(row[0])
+                self.stdout.write('')
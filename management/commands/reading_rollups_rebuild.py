@@ -0,0 +1,57 @@
+# stdlib
+import time
+from datetime import datetime
+# lib
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+# local
+from plot.models import Reading, ReadingRollup, Source
+
+
+class Command(BaseCommand):
+    """
+    Recalculate the Reading Rollups of Sources from their Readings, to populate them for existing Readings or to repair
+    them
+    """
+    help = 'Recalculate the hourly, daily and monthly Reading Rollups of Sources from their Readings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source-id',
+            type=int,
+            action='append',
+            dest='source_ids',
+            help='A Source to rebuild the Rollups for. Can be sent more than once. Defaults to all Sources',
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+        Run the command by:
+            - Fetching the ids of the Sources
+            - Recalculating the Rollups of each Source, one Source per transaction, over the range of its Readings and
+              its existing Rollups
+        """
+        source_ids = kwargs['source_ids']
+        if source_ids is None:
+            source_ids = list(Source.objects.order_by('pk').values_list('pk', flat=True))
+
+        for source_id in source_ids:
+            start = time.monotonic()
+            readings = Reading.objects.filter(source_id=source_id, deleted__isnull=True).aggregate(
+                earliest=Min('datetime_taken'),
+                latest=Max('datetime_taken'),
+            )
+            rollups = ReadingRollup.objects.filter(source_id=source_id).aggregate(
+                earliest=Min('bucket_start'),
+                latest=Max('bucket_start'),
+            )
+            datetimes = [dt for dt in (*readings.values(), *rollups.values()) if dt is not None]
+            if len(datetimes) == 0:
+                continue
+            ReadingRollup.objects.refresh({source_id: (min(datetimes), max(datetimes))})
+            self.stdout.write(
+                f'{datetime.now()}: Source #{source_id} rebuilt Rollups from '
+                f'{readings["earliest"]} to {readings["latest"]} in {time.monotonic() - start:.2f}s',
+            )
+
+        self.stdout.write(f'{datetime.now()}: Completed rebuilding the Rollups for {len(source_ids)} Sources')
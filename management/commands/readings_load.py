@@ -0,0 +1,53 @@
+# stdlib
+import time
+# lib
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+# local
+from plot.bulk_load import copy_readings, FORMATS
+
+
+class Command(BaseCommand):
+    """
+    Load Readings from a CSV or NDJSON file using PostgreSQL COPY
+    """
+    help = 'Load Readings from a CSV or NDJSON file using PostgreSQL COPY'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='The file of Readings to load')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default=None,
+            help='The format of the file. Defaults to the file extension.',
+        )
+        parser.add_argument(
+            '--address-id',
+            type=int,
+            default=None,
+            help='Only load Readings for Sources in a Category belonging to this Address',
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+        Run the command by:
+            - Streaming the file into a staging table with COPY
+            - Merging the staged rows into the reading table, skipping Readings that already exist
+        """
+        path = kwargs['path']
+        file_format = kwargs['format'] or path.rsplit('.', 1)[-1].lower()
+        if file_format not in FORMATS:
+            raise CommandError(f'Unable to determine the format of {path}. Use --format to specify one of {FORMATS}')
+
+        start = time.monotonic()
+        try:
+            with open(path, 'rb') as stream:
+                received, created = copy_readings(stream, file_format, kwargs['address_id'])
+        except (DatabaseError, KeyError, TypeError, ValueError) as e:
+            raise CommandError(f'Failed to load Readings from {path}: {e}')
+        elapsed = time.monotonic() - start
+
+        self.stdout.write(
+            f'Loaded {created} of {received} Readings from {path} in {elapsed:.2f}s '
+            f'({received / max(elapsed, 0.001):.0f} rows per second)',
+        )
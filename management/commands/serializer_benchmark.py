@@ -0,0 +1,99 @@
+# stdlib
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+# lib
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+# local
+from plot.models import Category, Reading, Source, SourceShare, Unit
+from plot.serializers import ReadingSerializer
+
+
+URL_NAMES = {
+    Category: 'category_resource',
+    Reading: 'reading_resource',
+    Source: 'source_resource',
+    SourceShare: 'source_share_resource',
+    Unit: 'unit_resource',
+}
+
+
+def get_readings(number: int, sources: int):
+    """
+    Build unsaved Readings spread over a number of Sources, with everything the ReadingSerializer needs in memory
+    """
+    now = datetime.now(timezone.utc)
+    unit = Unit(id=1, abbreviation='kWh', address_id=1, created=now, name='Kilowatt Hour', updated=now)
+    category = Category(id=1, address_id=1, created=now, name='Energy', updated=now)
+    source_list = [
+        Source(
+            id=i + 1,
+            accumulating=False,
+            amber_high=Decimal('80'),
+            amber_low=Decimal('20'),
+            category=category,
+            created=now,
+            description=f'Source {i + 1}',
+            red_high=Decimal('90'),
+            red_low=Decimal('10'),
+            retention=3650,
+            seconds_valid=3600,
+            unit=unit,
+            updated=now,
+        )
+        for i in range(sources)
+    ]
+    return [
+        Reading(id=i + 1, datetime_taken=now, source=source_list[i % sources], value=Decimal(i))
+        for i in range(number)
+    ]
+
+
+class Command(BaseCommand):
+    """
+    Time the ReadingSerializer on in memory Readings, generating the uri of each record with reverse() and with the
+    cached URL templates used by get_absolute_url. No database queries are run.
+    """
+    help = 'Print the time taken to serialize Readings with reverse() and with cached URL templates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readings', type=int, default=1000, help='The number of Readings. Defaults to 1000')
+        parser.add_argument('--sources', type=int, default=10, help='The number of Sources. Defaults to 10')
+        parser.add_argument('--repeat', type=int, default=20, help='The number of runs to average. Defaults to 20')
+
+    def handle(self, *args, **kwargs):
+        """
+        Run the command by:
+            - Building the Readings
+            - Serializing them repeatedly with get_absolute_url calling reverse(), as it did before URL templates
+            - Serializing them repeatedly with get_absolute_url formatting the cached URL templates
+            - Printing the average time per 1,000 Readings of each
+        """
+        readings = get_readings(kwargs['readings'], kwargs['sources'])
+        per_thousand = 1000 / len(readings)
+
+        templates = {model: model.get_absolute_url for model in URL_NAMES}
+        for model, name in URL_NAMES.items():
+            model.get_absolute_url = lambda obj, name=name: reverse(name, kwargs={'pk': obj.pk})
+        try:
+            reverse_time = self.time_serializer(readings, kwargs['repeat'])
+        finally:
+            for model, get_absolute_url in templates.items():
+                model.get_absolute_url = get_absolute_url
+        template_time = self.time_serializer(readings, kwargs['repeat'])
+
+        self.stdout.write(f'reverse():     {reverse_time * per_thousand * 1000:.2f}ms per 1,000 Readings')
+        self.stdout.write(f'URL templates: {template_time * per_thousand * 1000:.2f}ms per 1,000 Readings')
+        self.stdout.write(f'Speed up:      {reverse_time / template_time:.2f}x')
+
+    def time_serializer(self, readings, repeat: int) -> float:
+        """
+        Serialize the Readings repeatedly, after one untimed run to warm any caches
+        :return: The average time of a run in seconds
+        """
+        ReadingSerializer(instance=readings, many=True).data
+        start = time.perf_counter()
+        for _ in range(repeat):
+            ReadingSerializer(instance=readings, many=True).data
+        return (time.perf_counter() - start) / repeat
@@ -0,0 +1,34 @@
+# stdlib
+from datetime import datetime
+# lib
+from django.core.management.base import BaseCommand
+# local
+from plot.models import Source, SourceLatestReading
+
+
+class Command(BaseCommand):
+    """
+    Populate the latest Reading for every Source from the existing Readings
+    """
+    help = 'Populate the latest Reading for every Source from the existing Readings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='The number of Sources refreshed in a single query. Defaults to 1000',
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+        Run the command by:
+            - Fetching the ids of all Sources
+            - Recalculating the latest Reading for the Sources in batches
+        """
+        batch_size = kwargs['batch_size']
+        source_ids = list(Source.objects.order_by('pk').values_list('pk', flat=True))
+        for i in range(0, len(source_ids), batch_size):
+            SourceLatestReading.objects.refresh(source_ids[i:i + batch_size])
+
+        self.stdout.write(f'{datetime.now()}: Completed refreshing the latest Reading for {len(source_ids)} Sources')
@@ -1,10 +1,20 @@
 # stdlib
-from datetime import datetime, timedelta
-from typing import List
+import json
+import os
+import tempfile
+import time
+from datetime import date, datetime
+from multiprocessing import Pool
+from typing import List, Set, Tuple
 # lib
 from django.core.management.base import BaseCommand
+from django.db import connections
 # local
-from plot.models import Reading, Source
+from plot.models import Source
+from plot.retention import drop_expired_partitions, get_cutoff, purge_readings
+
+
+DEFAULT_CHECKPOINT = os.path.join(tempfile.gettempdir(), 'plot_source_readings_delete.json')
 
 
 def get_sources() -> List[Source]:
@@ -12,27 +22,109 @@ def get_sources() -> List[Source]:
     return objs
 
 
+def delete_readings(args: Tuple[int, date, int]) -> Tuple[int, int, float]:
+    """
+    Delete the Readings of a single Source older than the cutoff. Run in the worker processes.
+    :param args: The id of the Source, the cutoff date and the batch size
+    :return: The id of the Source, the number of Readings deleted and the time taken in seconds
+    """
+    source_id, cutoff, batch_size = args
+    start = time.monotonic()
+    purged = purge_readings(source_id, cutoff, batch_size)
+    return source_id, purged, time.monotonic() - start
+
+
 class Command(BaseCommand):
     """
-    For Sources, delete Readings whicj are older than the retention policy of the Source
+    For Sources, delete Readings which are older than the retention policy of the Source
     """
     help = 'For Sources, delete Readings older than the retention policy of its Source'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='The maximum number of Readings deleted in a single transaction. Defaults to 10000',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=DEFAULT_CHECKPOINT,
+            help=f'The file used to record completed Sources so an interrupted run resumes. Defaults to '
+                 f'{DEFAULT_CHECKPOINT}',
+        )
+        parser.add_argument(
+            '--detach-only',
+            action='store_true',
+            help='Detach expired partitions from the reading table instead of dropping them',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='The number of processes deleting Readings in parallel. Defaults to 1',
+        )
+
     def handle(self, *args, **kwargs):
         """
         Run the command by:
             - Fetching all Sources
-            - Iterating through these Sources, delete Readings older than the retention
+            - Removing the partitions of the reading table that are older than the retention of every Source
+            - Deleting the Readings older than the retention of each Source not completed by an interrupted run, across
+              the worker processes
+            - Removing the checkpoint once every Source is completed
         """
         self.today = datetime.now().date()
+        self.checkpoint = kwargs['checkpoint']
 
-        sources = get_sources()
-        for source in sources:
-            self.delete_readings(source)
+        sources = list(get_sources())
+        start = time.monotonic()
+        for name in drop_expired_partitions(sources, self.today, kwargs['detach_only']):
+            self.stdout.write(f'{self.today}: Removed partition {name}')
+        self.stdout.write(f'{self.today}: Completed removing expired partitions in {time.monotonic() - start:.2f}s')
 
+        completed = self.load_checkpoint()
+        if len(completed) > 0:
+            self.stdout.write(f'{self.today}: Resuming from {self.checkpoint}, {len(completed)} Sources completed')
+        tasks = [
+            (source.pk, get_cutoff(source, self.today), kwargs['batch_size'])
+            for source in sources
+            if source.pk not in completed
+        ]
+
+        if kwargs['workers'] > 1:
+            # Each worker process must open its own database connections
+            connections.close_all()
+            with Pool(processes=kwargs['workers']) as pool:
+                for result in pool.imap_unordered(delete_readings, tasks):
+                    self.source_completed(completed, *result)
+        else:
+            for task in tasks:
+                self.source_completed(completed, *delete_readings(task))
+
+        if os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
         self.stdout.write(f'{self.today}: Completed deleting Readings older than its Source Retention Policy')
 
-    def delete_readings(self, source: Source):
-        policy = self.today - timedelta(days=source.retention)
-        Reading.objects.filter(datetime_taken__lt=policy).update(deleted=datetime.now())
+    def load_checkpoint(self) -> Set[int]:
+        """
+        Read the Sources completed by an interrupted run today. A checkpoint from a previous day is ignored as the
+        cutoffs have moved since.
+        """
+        if not os.path.exists(self.checkpoint):
+            return set()
+        with open(self.checkpoint) as f:
+            checkpoint = json.load(f)
+        if checkpoint['date'] != str(self.today):
+            return set()
+        return set(checkpoint['completed'])
+
+    def source_completed(self, completed: Set[int], source_id: int, purged: int, elapsed: float):
+        """
+        Report the Readings deleted for a Source and record it in the checkpoint
+        """
+        completed.add(source_id)
+        with open(self.checkpoint, 'w') as f:
+            json.dump({'date': str(self.today), 'completed': sorted(completed)}, f)
+        self.stdout.write(f'{self.today}: Source #{source_id} deleted {purged} Readings in {elapsed:.2f}s')
         return None
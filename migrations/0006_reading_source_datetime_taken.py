@@ -0,0 +1,43 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plot', '0005_django5'),
+    ]
+
+    operations = [
+        # Soft delete any duplicate Readings for a Source and datetime_taken, keeping the first created, so the unique
+        # constraint can be added
+        migrations.RunSQL(
+            sql="""
+                UPDATE reading SET deleted = now()
+                WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, row_number() OVER (PARTITION BY source_id, datetime_taken ORDER BY id) AS position
+                        FROM reading
+                        WHERE deleted IS NULL
+                    ) duplicates
+                    WHERE position > 1
+                )
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RemoveIndex(
+            model_name='reading',
+            name='reading_value',
+        ),
+        migrations.AddIndex(
+            model_name='reading',
+            index=models.Index(fields=['source', '-datetime_taken'], name='reading_source_datetime_taken'),
+        ),
+        migrations.AddConstraint(
+            model_name='reading',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(deleted__isnull=True),
+                fields=('source', 'datetime_taken'),
+                name='reading_source_datetime_taken_unique',
+            ),
+        ),
+    ]
@@ -0,0 +1,121 @@
+"""
+Partition the reading table by month on datetime_taken.
+
+PostgreSQL requires the primary key of a partitioned table to include the partition key, so the primary key of the
+table becomes (id, datetime_taken). The id column keeps its own sequence and Django continues to treat it as the primary
+key of the Reading model, so the model state is not changed by this migration.
+
+A partition is created for every month that has Readings, up to three months ahead. Further partitions are created by
+the reading_partitions_create management command. Readings outside of the created months go to reading_default.
+
+The existing Readings are copied into the partitioned table, which takes time and disk space proportional to the size of
+the reading table. The reading table is locked against writes until the migration commits, so creating, updating and
+deleting Readings blocks for the duration of the copy. Readings can be read until the old table is dropped.
+
+Reversing the migration copies the Readings of every partition back into a plain reading table with the indexes of 0006,
+which takes the same time and space and blocks writes in the same way.
+"""
+from django.db import migrations
+
+
+PARTITION_SQL = """
+-- Block writes until the migration commits, so no Reading is written after the copy and lost with the old table
+LOCK TABLE reading IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE SEQUENCE reading_partitioned_id_seq AS bigint;
+SELECT setval('reading_partitioned_id_seq', COALESCE((SELECT max(id) FROM reading), 0) + 1, false);
+
+CREATE TABLE reading_partitioned (
+    id bigint NOT NULL DEFAULT nextval('reading_partitioned_id_seq'),
+    created timestamp with time zone NOT NULL,
+    updated timestamp with time zone NOT NULL,
+    deleted timestamp with time zone NULL,
+    extra jsonb NOT NULL,
+    datetime_taken timestamp with time zone NOT NULL,
+    value numeric(10, 2) NOT NULL,
+    source_id bigint NOT NULL,
+    PRIMARY KEY (id, datetime_taken)
+) PARTITION BY RANGE (datetime_taken);
+
+DO $$
+DECLARE
+    month timestamp;
+    last_month timestamp;
+BEGIN
+    SELECT
+        date_trunc('month', COALESCE(min(datetime_taken), now()) AT TIME ZONE 'UTC'),
+        date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months'
+    INTO month, last_month
+    FROM reading;
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF reading_partitioned FOR VALUES FROM (%L) TO (%L)',
+            'reading_' || to_char(month, 'YYYY_MM'),
+            to_char(month, 'YYYY-MM-DD') || ' 00:00:00+00',
+            to_char(month + interval '1 month', 'YYYY-MM-DD') || ' 00:00:00+00'
+        );
+        month := month + interval '1 month';
+    END LOOP;
+END $$;
+CREATE TABLE reading_default PARTITION OF reading_partitioned DEFAULT;
+
+INSERT INTO reading_partitioned (id, created, updated, deleted, extra, datetime_taken, value, source_id)
+SELECT id, created, updated, deleted, extra, datetime_taken, value, source_id FROM reading;
+
+DROP TABLE reading;
+ALTER TABLE reading_partitioned RENAME TO reading;
+ALTER SEQUENCE reading_partitioned_id_seq RENAME TO reading_id_seq;
+ALTER SEQUENCE reading_id_seq OWNED BY reading.id;
+
+ALTER TABLE reading ADD CONSTRAINT reading_source_id_fk_source_id
+    FOREIGN KEY (source_id) REFERENCES source (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX reading_datetime_taken ON reading (datetime_taken);
+CREATE INDEX reading_id ON reading (id);
+CREATE INDEX reading_source_datetime_taken ON reading (source_id, datetime_taken DESC);
+CREATE UNIQUE INDEX reading_source_datetime_taken_unique ON reading (source_id, datetime_taken) WHERE deleted IS NULL;
+"""
+
+UNPARTITION_SQL = """
+LOCK TABLE reading IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE TABLE reading_unpartitioned (
+    id bigint NOT NULL,
+    created timestamp with time zone NOT NULL,
+    updated timestamp with time zone NOT NULL,
+    deleted timestamp with time zone NULL,
+    extra jsonb NOT NULL,
+    datetime_taken timestamp with time zone NOT NULL,
+    value numeric(10, 2) NOT NULL,
+    source_id bigint NOT NULL
+);
+
+INSERT INTO reading_unpartitioned (id, created, updated, deleted, extra, datetime_taken, value, source_id)
+SELECT id, created, updated, deleted, extra, datetime_taken, value, source_id FROM reading;
+
+-- The sequence would be dropped with the partitioned table that owns it
+ALTER SEQUENCE reading_id_seq OWNED BY NONE;
+DROP TABLE reading;
+ALTER TABLE reading_unpartitioned RENAME TO reading;
+ALTER TABLE reading ALTER COLUMN id SET DEFAULT nextval('reading_id_seq');
+ALTER SEQUENCE reading_id_seq OWNED BY reading.id;
+
+ALTER TABLE reading ADD CONSTRAINT reading_pkey PRIMARY KEY (id);
+ALTER TABLE reading ADD CONSTRAINT reading_source_id_fk_source_id
+    FOREIGN KEY (source_id) REFERENCES source (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX reading_source_id ON reading (source_id);
+CREATE INDEX reading_datetime_taken ON reading (datetime_taken);
+CREATE INDEX reading_id ON reading (id);
+CREATE INDEX reading_source_datetime_taken ON reading (source_id, datetime_taken DESC);
+CREATE UNIQUE INDEX reading_source_datetime_taken_unique ON reading (source_id, datetime_taken) WHERE deleted IS NULL;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plot', '0006_reading_source_datetime_taken'),
+    ]
+
+    operations = [
+        migrations.RunSQL(sql=PARTITION_SQL, reverse_sql=UNPARTITION_SQL),
+    ]
@@ -0,0 +1,41 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plot', '0007_reading_partitioned'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceLatestReading',
+            fields=[
+                ('datetime_taken', models.DateTimeField()),
+                ('reading_id', models.BigIntegerField()),
+                ('source', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    primary_key=True,
+                    related_name='latest_reading',
+                    serialize=False,
+                    to='plot.source',
+                )),
+                ('value', models.DecimalField(decimal_places=2, max_digits=10)),
+            ],
+            options={
+                'db_table': 'source_latest_reading',
+            },
+        ),
+        # Populate the latest Reading of every Source with Readings, matching SourceLatestReadingManager.refresh
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO source_latest_reading (source_id, reading_id, datetime_taken, value)
+                SELECT DISTINCT ON (source_id) source_id, id, datetime_taken, value
+                FROM reading
+                WHERE deleted IS NULL
+                ORDER BY source_id, datetime_taken DESC
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plot', '0008_source_latest_reading'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sourcelatestreading',
+            name='alert_level',
+            field=models.CharField(max_length=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='sourcelatestreading',
+            index=models.Index(fields=['alert_level'], name='source_latest_reading_alert'),
+        ),
+        # Classify the existing latest Readings, matching plot.models.source_latest_reading.get_alert_level
+        migrations.RunSQL(
+            sql="""
+                UPDATE source_latest_reading SET alert_level = CASE
+                    WHEN source.accumulating THEN NULL
+                    WHEN source_latest_reading.value <= source.red_low THEN 'red_low'
+                    WHEN source_latest_reading.value >= source.red_high THEN 'red_high'
+                    WHEN source_latest_reading.value <= source.amber_low THEN 'amber_low'
+                    WHEN source_latest_reading.value >= source.amber_high THEN 'amber_high'
+                    ELSE 'green'
+                END
+                FROM source
+                WHERE source.id = source_latest_reading.source_id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,93 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Populate the rollups for the existing Readings, matching the queries of plot.models.reading_rollup. Hourly rollups are
+# calculated from the Readings, daily rollups from the hourly rollups and monthly rollups from the daily rollups
+BACKFILL_SQL = """
+INSERT INTO reading_rollup (
+    source_id, granularity, bucket_start, count, sum, min_value, max_value, first_datetime_taken, first_value,
+    last_datetime_taken, last_value
+)
+SELECT
+    source_id,
+    'hour',
+    date_trunc('hour', datetime_taken AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+    count(*),
+    sum(value),
+    min(value),
+    max(value),
+    min(datetime_taken),
+    (array_agg(value ORDER BY datetime_taken))[1],
+    max(datetime_taken),
+    (array_agg(value ORDER BY datetime_taken DESC))[1]
+FROM reading
+WHERE deleted IS NULL
+GROUP BY 1, 3;
+"""
+for granularity, finer_granularity in (('day', 'hour'), ('month', 'day')):
+    BACKFILL_SQL += f"""
+INSERT INTO reading_rollup (
+    source_id, granularity, bucket_start, count, sum, min_value, max_value, first_datetime_taken, first_value,
+    last_datetime_taken, last_value
+)
+SELECT
+    source_id,
+    '{granularity}',
+    date_trunc('{granularity}', bucket_start AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+    sum(count),
+    sum(sum),
+    min(min_value),
+    max(max_value),
+    min(first_datetime_taken),
+    (array_agg(first_value ORDER BY first_datetime_taken))[1],
+    max(last_datetime_taken),
+    (array_agg(last_value ORDER BY last_datetime_taken DESC))[1]
+FROM reading_rollup
+WHERE granularity = '{finer_granularity}'
+GROUP BY 1, 3;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plot', '0009_source_latest_reading_alert_level'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.IntegerField()),
+                ('first_datetime_taken', models.DateTimeField()),
+                ('first_value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('granularity', models.CharField(max_length=5)),
+                ('last_datetime_taken', models.DateTimeField()),
+                ('last_value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('min_value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('source', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='rollups',
+                    to='plot.source',
+                )),
+                ('sum', models.DecimalField(decimal_places=2, max_digits=20)),
+            ],
+            options={
+                'db_table': 'reading_rollup',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='readingrollup',
+            constraint=models.UniqueConstraint(
+                fields=('source', 'granularity', 'bucket_start'),
+                name='reading_rollup_source_granularity_bucket_start',
+            ),
+        ),
+        # The Summary services read the rollups as soon as the table exists, so it is populated here rather than left
+        # for the reading_rollups_rebuild management command
+        migrations.RunSQL(sql=BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
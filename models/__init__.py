@@ -1,6 +1,8 @@
 from .category import Category
 from .reading import Reading
+from .reading_rollup import ReadingRollup
 from .source import Source
+from .source_latest_reading import SourceLatestReading
 from .source_share import SourceShare
 from .unit import Unit
 
@@ -10,8 +12,12 @@ __all__ = [
     'Category',
     # Reading
     'Reading',
+    # Reading Rollup
+    'ReadingRollup',
     # Source
     'Source',
+    # Source Latest Reading
+    'SourceLatestReading',
     # Source Share
     'SourceShare',
     # Unit
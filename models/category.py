@@ -1,8 +1,8 @@
 # libs
 from cloudcix_rest.models import BaseModel
 from django.db import models
-from django.urls import reverse
-
+# local
+from plot.utils import get_resource_uri
 
 __all__ = [
     'Category',
@@ -30,4 +30,4 @@ class Category(BaseModel):
         Generates the absolute URL that corresponds to the Category Resource view for this Category record
         :return: A URL that corresponds to the views for this Category record
         """
-        return reverse('category_resource', kwargs={'pk': self.pk})
+        return get_resource_uri('category_resource', self.pk)
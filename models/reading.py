@@ -1,8 +1,8 @@
 # libs
 from cloudcix_rest.models import BaseManager, BaseModel
 from django.db import models
-from django.urls import reverse
 # local
+from plot.utils import get_resource_uri
 from .source import Source
 
 __all__ = [
@@ -27,7 +27,8 @@ class ReadingManager(BaseManager):
 
 class Reading(BaseModel):
     """
-    A Reading record represents a reading for a source
+    A Reading record represents a reading for a source.
+    The reading table is partitioned by month on datetime_taken, see plot.partitions
     """
     datetime_taken = models.DateTimeField()
     source = models.ForeignKey(Source, on_delete=models.PROTECT, related_name='readings')
@@ -37,10 +38,17 @@ class Reading(BaseModel):
 
     class Meta:
         db_table = 'reading'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'datetime_taken'],
+                condition=models.Q(deleted__isnull=True),
+                name='reading_source_datetime_taken_unique',
+            ),
+        ]
         indexes = [
             models.Index(fields=['datetime_taken'], name='reading_datetime_taken'),
             models.Index(fields=['id'], name='reading_id'),
-            models.Index(fields=['value'], name='reading_value'),
+            models.Index(fields=['source', '-datetime_taken'], name='reading_source_datetime_taken'),
         ]
         ordering = ['-datetime_taken']
 
@@ -49,4 +57,4 @@ class Reading(BaseModel):
         Generates the absolute URL that corresponds to the Reading Resource view for this Reading record
         :return: A URL that corresponds to the views for this Reading record
         """
-        return reverse('reading_resource', kwargs={'pk': self.pk})
+        return get_resource_uri('reading_resource', self.pk)
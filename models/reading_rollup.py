@@ -0,0 +1,181 @@
+# stdlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Tuple
+# libs
+from dateutil.relativedelta import relativedelta
+from django.db import connections, models, router, transaction
+# local
+from .reading import Reading
+from .source import Source
+
+
+__all__ = [
+    'GRANULARITIES',
+    'get_bucket_start',
+    'ReadingRollup',
+]
+
+
+# The granularities maintained for every Source, finest first, and the length of a bucket of each
+GRANULARITIES = {
+    'hour': relativedelta(hours=1),
+    'day': relativedelta(days=1),
+    'month': relativedelta(months=1),
+}
+
+# Aggregates the Readings of a Source in a range into buckets of the granularity
+READING_SQL = """
+SELECT
+    source_id,
+    date_trunc(%(granularity)s, datetime_taken AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS bucket_start,
+    count(*) AS count,
+    sum(value) AS sum,
+    min(value) AS min_value,
+    max(value) AS max_value,
+    min(datetime_taken) AS first_datetime_taken,
+    (array_agg(value ORDER BY datetime_taken))[1] AS first_value,
+    max(datetime_taken) AS last_datetime_taken,
+    (array_agg(value ORDER BY datetime_taken DESC))[1] AS last_value
+FROM reading
+WHERE source_id = %(source_id)s
+    AND deleted IS NULL
+    AND datetime_taken >= %(start)s
+    AND datetime_taken < %(end)s
+GROUP BY 1, 2
+"""
+
+# Aggregates the rollups of the next finer granularity of a Source in a range into buckets of the granularity
+ROLLUP_SQL = """
+SELECT
+    source_id,
+    date_trunc(%(granularity)s, bucket_start AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS bucket_start,
+    sum(count) AS count,
+    sum(sum) AS sum,
+    min(min_value) AS min_value,
+    max(max_value) AS max_value,
+    min(first_datetime_taken) AS first_datetime_taken,
+    (array_agg(first_value ORDER BY first_datetime_taken))[1] AS first_value,
+    max(last_datetime_taken) AS last_datetime_taken,
+    (array_agg(last_value ORDER BY last_datetime_taken DESC))[1] AS last_value
+FROM reading_rollup
+WHERE source_id = %(source_id)s
+    AND granularity = %(finer_granularity)s
+    AND bucket_start >= %(start)s
+    AND bucket_start < %(end)s
+GROUP BY 1, 2
+"""
+
+# Replaces the rollups of a Source in a range with the aggregates calculated by the query in computed, and removes the
+# rollups for buckets in the range that no longer have any Readings
+REFRESH_SQL = """
+WITH computed AS ({select}), upserted AS (
+    INSERT INTO reading_rollup (
+        source_id, granularity, bucket_start, count, sum, min_value, max_value, first_datetime_taken, first_value,
+        last_datetime_taken, last_value
+    )
+    SELECT
+        source_id, %(granularity)s, bucket_start, count, sum, min_value, max_value, first_datetime_taken, first_value,
+        last_datetime_taken, last_value
+    FROM computed
+    ON CONFLICT (source_id, granularity, bucket_start) DO UPDATE SET
+        count = EXCLUDED.count,
+        sum = EXCLUDED.sum,
+        min_value = EXCLUDED.min_value,
+        max_value = EXCLUDED.max_value,
+        first_datetime_taken = EXCLUDED.first_datetime_taken,
+        first_value = EXCLUDED.first_value,
+        last_datetime_taken = EXCLUDED.last_datetime_taken,
+        last_value = EXCLUDED.last_value
+)
+DELETE FROM reading_rollup
+WHERE source_id = %(source_id)s
+    AND granularity = %(granularity)s
+    AND bucket_start >= %(start)s
+    AND bucket_start < %(end)s
+    AND bucket_start NOT IN (SELECT bucket_start FROM computed)
+"""
+
+
+def get_bucket_start(dt: datetime, granularity: str) -> datetime:
+    """
+    Truncate the datetime, in UTC, to the start of the bucket of the granularity it is in
+    """
+    dt = dt.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if granularity in ('day', 'month'):
+        dt = dt.replace(hour=0)
+    if granularity == 'month':
+        dt = dt.replace(day=1)
+    return dt
+
+
+class ReadingRollupManager(models.Manager):
+    """
+    Manager for Reading Rollups which keeps the records up to date
+    """
+
+    def refresh(self, ranges: Dict[int, Tuple[datetime, datetime]]):
+        """
+        Recalculate the rollups of every granularity for the buckets of each Source that overlap a range.
+        Must be called whenever Readings for a Source are created, updated or deleted, with a range that includes the
+        datetime_taken of each Reading before and after the change.
+        Hourly rollups are calculated from the Readings, daily rollups from the hourly rollups and monthly rollups from
+        the daily rollups.
+        :param ranges: The earliest and latest datetime_taken of the changed Readings, by the id of their Source
+        """
+        using = router.db_for_write(ReadingRollup)
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            for source_id, (earliest, latest) in ranges.items():
+                finer_granularity = None
+                for granularity, length in GRANULARITIES.items():
+                    select = READING_SQL if finer_granularity is None else ROLLUP_SQL
+                    cursor.execute(
+                        REFRESH_SQL.format(select=select),
+                        {
+                            'end': get_bucket_start(latest, granularity) + length,
+                            'finer_granularity': finer_granularity,
+                            'granularity': granularity,
+                            'source_id': source_id,
+                            'start': get_bucket_start(earliest, granularity),
+                        },
+                    )
+                    finer_granularity = granularity
+
+    def refresh_readings(self, readings: Iterable[Reading]):
+        """
+        Recalculate the rollups for the buckets of the Readings
+        :param readings: The Readings that were created, updated or deleted
+        """
+        ranges = {}
+        for reading in readings:
+            earliest, latest = ranges.get(reading.source_id, (reading.datetime_taken, reading.datetime_taken))
+            ranges[reading.source_id] = (min(earliest, reading.datetime_taken), max(latest, reading.datetime_taken))
+        self.refresh(ranges)
+
+
+class ReadingRollup(models.Model):
+    """
+    A Reading Rollup record holds the aggregates of the Readings of a Source in an hour, day or month, so the Summary
+    services can read one record per bucket instead of scanning the reading table. Buckets start on UTC boundaries.
+    """
+    bucket_start = models.DateTimeField()
+    count = models.IntegerField()
+    first_datetime_taken = models.DateTimeField()
+    first_value = models.DecimalField(decimal_places=2, max_digits=10)
+    granularity = models.CharField(max_length=5)
+    last_datetime_taken = models.DateTimeField()
+    last_value = models.DecimalField(decimal_places=2, max_digits=10)
+    max_value = models.DecimalField(decimal_places=2, max_digits=10)
+    min_value = models.DecimalField(decimal_places=2, max_digits=10)
+    source = models.ForeignKey(Source, on_delete=models.CASCADE, related_name='rollups')
+    sum = models.DecimalField(decimal_places=2, max_digits=20)
+
+    objects = ReadingRollupManager()
+
+    class Meta:
+        db_table = 'reading_rollup'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'granularity', 'bucket_start'],
+                name='reading_rollup_source_granularity_bucket_start',
+            ),
+        ]
@@ -2,8 +2,8 @@
 from cloudcix_rest.models import BaseManager, BaseModel
 from datetime import datetime
 from django.db import models
-from django.urls import reverse
 # local
+from plot.utils import get_resource_uri
 from .category import Category
 from .unit import Unit
 
@@ -66,7 +66,7 @@ class Source(BaseModel):
         Generates the absolute URL that corresponds to the Source Resource view for this Source record
         :return: A URL that corresponds to the views for this Source record
         """
-        return reverse('source_resource', kwargs={'pk': self.pk})
+        return get_resource_uri('source_resource', self.pk)
 
     def cascade_delete(self):
         """
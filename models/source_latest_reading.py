@@ -0,0 +1,163 @@
+# stdlib
+from decimal import Decimal
+from typing import Iterable, Optional
+# libs
+from django.db import connections, models, router
+# local
+from .reading import Reading
+from .source import Source
+
+
+__all__ = [
+    'ALERT_LEVELS',
+    'get_alert_level',
+    'SourceLatestReading',
+]
+
+
+# Only replaces a record with a Reading that is at least as recent, so that a refresh that read the Readings before a
+# newer Reading was created cannot overwrite the record written for it
+UPSERT_NEWER_SQL = """
+INSERT INTO source_latest_reading (source_id, alert_level, datetime_taken, reading_id, value)
+VALUES {values}
+ON CONFLICT (source_id) DO UPDATE SET
+    alert_level = EXCLUDED.alert_level,
+    datetime_taken = EXCLUDED.datetime_taken,
+    reading_id = EXCLUDED.reading_id,
+    value = EXCLUDED.value
+WHERE EXCLUDED.datetime_taken >= source_latest_reading.datetime_taken
+"""
+
+ALERT_LEVELS = (
+    'amber_high',
+    'amber_low',
+    'green',
+    'red_high',
+    'red_low',
+)
+
+
+def get_alert_level(source: Source, value: Decimal) -> Optional[str]:
+    """
+    Classify a Reading value against the thresholds of its Source
+    :param source: The Source of the Reading
+    :param value: The value of the Reading
+    :return: One of ALERT_LEVELS, or None for accumulating Sources which have no thresholds
+    """
+    if source.accumulating:
+        return None
+    if source.red_low is not None and value <= source.red_low:
+        return 'red_low'
+    if source.red_high is not None and value >= source.red_high:
+        return 'red_high'
+    if source.amber_low is not None and value <= source.amber_low:
+        return 'amber_low'
+    if source.amber_high is not None and value >= source.amber_high:
+        return 'amber_high'
+    return 'green'
+
+
+class SourceLatestReadingManager(models.Manager):
+    """
+    Manager for Source Latest Readings which pre-fetches foreign keys and keeps the records up to date
+    """
+
+    def get_queryset(self) -> models.QuerySet:
+        """
+        Extend the Manager QuerySet to prefetch all related data in every query
+        :return: A base queryset which can be further extended but always pre-fetches necessary data
+        """
+        return super().get_queryset().select_related(
+            'source',
+            'source__category',
+            'source__unit',
+        )
+
+    def refresh(self, source_ids: Iterable[int], created: bool = False):
+        """
+        Recalculate the latest Reading for each of the specified Sources.
+        Must be called whenever Readings for a Source are created, updated or deleted.
+        :param source_ids: The ids of the Sources whose Readings have changed
+        :param created: Whether Readings were only created. A created Reading can only replace the latest Reading, so
+                        the records are only updated with Readings that are at least as recent, and are safe from
+                        concurrent refreshes. Updates and deletes can make an earlier Reading the latest, so the records
+                        are replaced outright.
+        """
+        source_ids = set(source_ids)
+        if len(source_ids) == 0:
+            return
+
+        latest_readings = Reading.objects.filter(
+            source_id__in=source_ids,
+            deleted__isnull=True,
+        ).order_by(
+            'source_id',
+            '-datetime_taken',
+        ).distinct(
+            'source_id',
+        )
+        objs = [
+            SourceLatestReading(
+                alert_level=get_alert_level(reading.source, reading.value),
+                datetime_taken=reading.datetime_taken,
+                reading_id=reading.pk,
+                source_id=reading.source_id,
+                value=reading.value,
+            )
+            for reading in latest_readings
+        ]
+        if created:
+            if len(objs) == 0:
+                return
+            params = []
+            for obj in objs:
+                params.extend([obj.source_id, obj.alert_level, obj.datetime_taken, obj.reading_id, obj.value])
+            values = ', '.join(['(%s, %s, %s, %s, %s)'] * len(objs))
+            with connections[router.db_for_write(SourceLatestReading)].cursor() as cursor:
+                cursor.execute(UPSERT_NEWER_SQL.format(values=values), params)
+            return
+
+        self.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=['source'],
+            update_fields=['alert_level', 'reading_id', 'datetime_taken', 'value'],
+        )
+        # Sources that no longer have any Readings
+        self.filter(source_id__in=source_ids - {obj.source_id for obj in objs}).delete()
+
+    def evaluate(self, source: Source):
+        """
+        Reclassify the latest Reading of the Source. Must be called whenever the thresholds of the Source change.
+        :param source: The Source with the updated thresholds
+        """
+        for obj in self.filter(source=source):
+            obj.alert_level = get_alert_level(source, obj.value)
+            obj.save(update_fields=['alert_level'])
+
+
+class SourceLatestReading(models.Model):
+    """
+    A Source Latest Reading record holds a copy of the most recent Reading for a Source, and its classification
+    against the thresholds of the Source, so the alerts for many Sources can be read without searching the reading table
+    """
+    alert_level = models.CharField(max_length=10, null=True)
+    datetime_taken = models.DateTimeField()
+    reading_id = models.BigIntegerField()
+    source = models.OneToOneField(Source, on_delete=models.CASCADE, primary_key=True, related_name='latest_reading')
+    value = models.DecimalField(decimal_places=2, max_digits=10)
+
+    objects = SourceLatestReadingManager()
+
+    class Meta:
+        db_table = 'source_latest_reading'
+        indexes = [
+            models.Index(fields=['alert_level'], name='source_latest_reading_alert'),
+        ]
+
+    def get_reading(self) -> Reading:
+        """
+        Build the Reading this record is a copy of, without querying the reading table
+        :return: An unsaved Reading instance with the id, Source, datetime_taken and value of the latest Reading
+        """
+        return Reading(id=self.reading_id, datetime_taken=self.datetime_taken, source=self.source, value=self.value)
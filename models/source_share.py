@@ -1,8 +1,8 @@
 # libs
 from cloudcix_rest.models import BaseManager, BaseModel
 from django.db import models
-from django.urls import reverse
 # local
+from plot.utils import get_resource_uri
 from .source import Source
 
 
@@ -48,4 +48,4 @@ class SourceShare(BaseModel):
         Generates the absolute URL that corresponds to the Source Share Resource view for this Source Share record
         :return: A URL that corresponds to the views for this Source Share record
         """
-        return reverse('source_share_resource', kwargs={'pk': self.pk})
+        return get_resource_uri('source_share_resource', self.pk)
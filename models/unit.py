@@ -1,8 +1,8 @@
 # libs
 from cloudcix_rest.models import BaseModel
 from django.db import models
-from django.urls import reverse
-
+# local
+from plot.utils import get_resource_uri
 
 __all__ = [
     'Unit',
@@ -31,4 +31,4 @@ class Unit(BaseModel):
         Generates the absolute URL that corresponds to the Unit Resource view for this Unit record
         :return: A URL that corresponds to the views for this Unit record
         """
-        return reverse('unit_resource', kwargs={'pk': self.pk})
+        return get_resource_uri('unit_resource', self.pk)
@@ -0,0 +1,95 @@
+"""
+Management of the monthly partitions of the reading table.
+
+The reading table is partitioned by range on datetime_taken, with one partition per calendar month (UTC) named
+reading_yyyy_mm, and a reading_default partition for any Reading outside of the existing months.
+"""
+# stdlib
+from datetime import date
+from typing import List, Tuple
+# libs
+from dateutil.relativedelta import relativedelta
+from django.db import connections, router, transaction
+# local
+from plot.models import Reading
+
+__all__ = [
+    'create_partition',
+    'DEFAULT_PARTITION',
+    'get_partitions',
+    'get_partition_name',
+]
+
+
+DEFAULT_PARTITION = 'reading_default'
+COLUMNS = 'id, created, updated, deleted, extra, datetime_taken, value, source_id'
+
+
+def get_partition_name(month: date) -> str:
+    """
+    Generate the name of the partition that contains the Readings for the month
+    """
+    return f'reading_{month.year:04d}_{month.month:02d}'
+
+
+def get_bounds(month: date) -> Tuple[str, str]:
+    """
+    Generate the inclusive lower and exclusive upper bounds, in UTC, of the partition for the month
+    """
+    start = month.replace(day=1)
+    end = start + relativedelta(months=1)
+    return f'{start.isoformat()} 00:00:00+00', f'{end.isoformat()} 00:00:00+00'
+
+
+def get_partitions() -> List[Tuple[str, date]]:
+    """
+    List the monthly partitions of the reading table
+    :return: The name and first day of the month of each partition, ordered by month
+    """
+    using = router.db_for_read(Reading)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits
+            INNER JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            INNER JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = 'reading'
+            """,
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        if name == DEFAULT_PARTITION:
+            continue
+        _, year, month = name.split('_')
+        partitions.append((name, date(int(year), int(month), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partition(month: date) -> bool:
+    """
+    Create the partition for the month, if it does not already exist.
+    Any Readings for the month in the default partition are moved into the new partition.
+    :return: A flag stating if the partition was created
+    """
+    name = get_partition_name(month)
+    start, end = get_bounds(month)
+    using = router.db_for_write(Reading)
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [name])
+        if cursor.fetchone()[0]:
+            return False
+        # A partition cannot be created for a range that has rows in the default partition, so detach it while the
+        # rows are moved
+        cursor.execute(f'ALTER TABLE reading DETACH PARTITION {DEFAULT_PARTITION}')
+        cursor.execute(f'CREATE TABLE {name} PARTITION OF reading FOR VALUES FROM (%s) TO (%s)', [start, end])
+        cursor.execute(
+            f'WITH moved AS ('
+            f'    DELETE FROM {DEFAULT_PARTITION} WHERE datetime_taken >= %s AND datetime_taken < %s'
+            f'    RETURNING {COLUMNS}'
+            f') INSERT INTO reading ({COLUMNS}) SELECT {COLUMNS} FROM moved',
+            [start, end],
+        )
+        cursor.execute(f'ALTER TABLE reading ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT')
+    return True
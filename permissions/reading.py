@@ -25,6 +25,28 @@ class Permissions:
             return Http403(error_code='plot_reading_create_201')
         return None
 
+    @staticmethod
+    def bulk_create(request: Request) -> Optional[Http403]:
+        """
+        The request to create many new Reading records is valid if:
+        - The User creating the Readings is a self-managed Member
+        """
+        # The requesting User's Member is self-managed
+        if not request.user.member['self_managed']:
+            return Http403(error_code='plot_reading_bulk_create_201')
+        return None
+
+    @staticmethod
+    def load(request: Request) -> Optional[Http403]:
+        """
+        The request to load Reading records from a file is valid if:
+        - The User loading the Readings is a self-managed Member
+        """
+        # The requesting User's Member is self-managed
+        if not request.user.member['self_managed']:
+            return Http403(error_code='plot_reading_load_201')
+        return None
+
     @staticmethod
     def update(request: Request) -> Optional[Http403]:
         """
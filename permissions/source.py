@@ -8,16 +8,17 @@ call the method in the view
 from typing import Optional
 # libs
 from cloudcix_rest.exceptions import Http403
-from cloudcix.api.membership import Membership
+from jaeger_client import Span
 from rest_framework.request import Request
 # local
 from plot.models import Source
+from plot.utils import get_member_for_address
 
 
 class Permissions:
 
     @staticmethod
-    def read(request: Request, obj: Source) -> Optional[Http403]:
+    def read(request: Request, obj: Source, span: Span) -> Optional[Http403]:
         """
         The request to read a Source object is valid if:
         - The User's Address owns the Category of the Source.
@@ -28,9 +29,7 @@ class Permissions:
             if not request.user.global_active:
                 return Http403(error_code='plot_source_read_201')
             # The User is global active and an address in their Member owns the Category of the Source.
-            response = Membership.address.read(
-                token=request.user.token,
-                pk=obj.category.address_id)
-            if response.status_code != 200 or response.json()['content']['member']['id'] != request.user.member['id']:
+            member_id = get_member_for_address(request, obj.category.address_id, span)
+            if member_id != request.user.member['id']:
                 return Http403(error_code='plot_source_read_202')
         return None
@@ -33,7 +33,7 @@ class Permissions:
             # User is global
             if not request.user.global_active:
                 return Http403(error_code='plot_source_summary_list_201')
-            user_member_addresses = get_addresses_in_member()
+            user_member_addresses = get_addresses_in_member(request, request.span)
             # An address in the global users Member owns the Category of the Source
             if obj.category.address_id not in user_member_addresses:
                 # Source has been shared with an address in the global users Member
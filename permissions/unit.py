@@ -8,16 +8,17 @@ call the method in the view
 from typing import Optional
 # libs
 from cloudcix_rest.exceptions import Http403
-from cloudcix.api.membership import Membership
+from jaeger_client import Span
 from rest_framework.request import Request
 # local
 from plot.models import Source, Unit
+from plot.utils import get_member_for_address
 
 
 class Permissions:
 
     @staticmethod
-    def read(request: Request, obj: Unit) -> Optional[Http403]:
+    def read(request: Request, obj: Unit, span: Span) -> Optional[Http403]:
         """
         The request to read a Unit object is valid if:
         - The User's Address owns the Unit.
@@ -28,10 +29,8 @@ class Permissions:
             if not request.user.global_active:
                 return Http403(error_code='plot_unit_read_201')
             # The User is global active and an address in their Member owns the Unit of the Source.
-            response = Membership.address.read(
-                token=request.user.token,
-                pk=obj.address_id)
-            if response.status_code != 200 or response.json()['content']['member']['id'] != request.user.member['id']:
+            member_id = get_member_for_address(request, obj.address_id, span)
+            if member_id != request.user.member['id']:
                 return Http403(error_code='plot_unit_read_202')
         return None
 
@@ -0,0 +1,117 @@
+"""
+Enforcement of the retention policy of Sources on the reading table.
+
+Readings older than the retention of their Source are removed permanently rather than soft deleted, so they do not stay
+in the table and its indexes. Monthly partitions that have expired for every Source are removed as a whole, and the
+remaining expired Readings are deleted in bounded batches so that each transaction, and the WAL it generates, stays
+small.
+"""
+# stdlib
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, List
+# libs
+from dateutil.relativedelta import relativedelta
+from django.db import connections, router, transaction
+# local
+from plot.models import Reading, ReadingRollup, Source, SourceLatestReading
+from plot.partitions import get_partitions
+from plot.summary_cache import invalidate_summary_sources
+
+__all__ = [
+    'drop_expired_partitions',
+    'get_cutoff',
+    'purge_readings',
+]
+
+# The start of the range of Reading Rollups recalculated when expired Readings are removed
+EARLIEST = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def get_cutoff(source: Source, today: date) -> date:
+    """
+    Readings taken before the cutoff date are outside the retention policy of the Source
+    """
+    return today - timedelta(days=source.retention)
+
+
+def drop_expired_partitions(sources: Iterable[Source], today: date, detach_only: bool = False) -> List[str]:
+    """
+    Remove the monthly partitions of the reading table that are outside the retention policy of every Source
+    :param sources: All of the Sources that have Readings
+    :param today: The date the retention policy is calculated from
+    :param detach_only: When True the partitions are detached from the reading table but not dropped, e.g. to archive
+    :return: The names of the partitions removed
+    """
+    cutoffs = [get_cutoff(source, today) for source in sources]
+    if len(cutoffs) == 0:
+        return []
+    # A partition has expired once the month it holds ends before the earliest cutoff of any Source
+    earliest_cutoff = min(cutoffs)
+
+    removed = []
+    using = router.db_for_write(Reading)
+    for name, month in get_partitions():
+        end = month + relativedelta(months=1)
+        if end > earliest_cutoff:
+            break
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            cursor.execute(f'ALTER TABLE reading DETACH PARTITION {name}')
+            if not detach_only:
+                cursor.execute(f'DROP TABLE {name}')
+        removed.append(name)
+        # Sources whose latest Reading was in the removed partition
+        SourceLatestReading.objects.refresh(
+            SourceLatestReading.objects.filter(datetime_taken__lt=end).values_list('source_id', flat=True),
+        )
+        end_datetime = datetime.combine(end, time.min, tzinfo=timezone.utc)
+        source_ids = list(
+            ReadingRollup.objects.filter(bucket_start__lt=end_datetime).values_list('source_id', flat=True).distinct(),
+        )
+        ReadingRollup.objects.refresh({source_id: (EARLIEST, end_datetime) for source_id in source_ids})
+        invalidate_summary_sources(source_ids)
+    return removed
+
+
+def purge_readings(source_id: int, cutoff: date, batch_size: int) -> int:
+    """
+    Permanently delete the Readings for the Source taken before the cutoff, in batches of at most batch_size rows
+    ordered by datetime_taken and id. Each batch is committed separately and continues from the last Reading deleted by
+    the previous batch, so every batch is a range scan of the (source_id, datetime_taken) index.
+    :return: The number of Readings deleted
+    """
+    using = router.db_for_write(Reading)
+    purged = 0
+    last_datetime_taken, last_id = EARLIEST, 0
+    while True:
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            cursor.execute(
+                """
+                WITH batch AS (
+                    SELECT id, datetime_taken FROM reading
+                    WHERE source_id = %s AND datetime_taken < %s AND (datetime_taken, id) > (%s, %s)
+                    ORDER BY datetime_taken, id
+                    LIMIT %s
+                ), deleted AS (
+                    DELETE FROM reading USING batch
+                    WHERE reading.id = batch.id AND reading.datetime_taken = batch.datetime_taken
+                    RETURNING reading.id, reading.datetime_taken
+                )
+                SELECT count(*) OVER (), datetime_taken, id FROM deleted
+                ORDER BY datetime_taken DESC, id DESC
+                LIMIT 1
+                """,
+                [source_id, cutoff, last_datetime_taken, last_id, batch_size],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            break
+        deleted, last_datetime_taken, last_id = row
+        purged += deleted
+        if deleted < batch_size:
+            break
+
+    if purged > 0:
+        SourceLatestReading.objects.refresh([source_id])
+        ReadingRollup.objects.refresh({source_id: (EARLIEST, datetime.combine(cutoff, time.min, tzinfo=timezone.utc))})
+        invalidate_summary_sources([source_id])
+    return purged
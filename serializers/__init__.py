@@ -1,5 +1,5 @@
 from .category import CategorySerializer
-from .reading import ReadingSerializer
+from .reading import get_reading_lean_serializer, ReadingLeanSerializer, ReadingSerializer
 from .source import SourceSerializer
 from .source_share import SourceShareSerializer
 from .unit import UnitSerializer
@@ -9,6 +9,8 @@ __all__ = [
     # Category
     'CategorySerializer',
     # Reading
+    'get_reading_lean_serializer',
+    'ReadingLeanSerializer',
     'ReadingSerializer',
     # Source
     'SourceSerializer',
@@ -1,3 +1,6 @@
+# stdlib
+from functools import lru_cache
+from typing import Tuple, Type
 # libs
 import serpy
 # local
@@ -6,8 +9,14 @@ from .source import SourceSerializer
 __all__ = [
     # Reading Serializer
     'ReadingSerializer',
+    'ReadingLeanSerializer',
+    'get_reading_lean_serializer',
 ]
 
+# The fields that can be sent in the "fields" parameter for flat Reading rows, and those returned when it is not sent
+READING_LEAN_FIELDS = ('datetime_taken', 'id', 'source_id', 'uri', 'value')
+READING_LEAN_DEFAULT_FIELDS = ('datetime_taken', 'id', 'source_id', 'value')
+
 
 class ReadingSerializer(serpy.Serializer):
     """
@@ -36,3 +45,38 @@ class ReadingSerializer(serpy.Serializer):
     source_id = serpy.Field()
     uri = serpy.Field(attr='get_absolute_url', call=True)
     value = serpy.StrField()
+
+
+class ReadingLeanSerializer(serpy.Serializer):
+    """
+    datetime_taken:
+        description: Date and time that a reading was taken
+        type: string
+    id:
+        description: The ID of the Reading
+        type: integer
+    source_id:
+        description: The ID of the Source of the Reading
+        type: integer
+    uri:
+        description: URL that can be used to run methods in the API associated with the Reading instance.
+        type: string
+    value:
+        description: value of the Readings
+        type: string
+        format: decimal
+    """
+    datetime_taken = serpy.Field(attr='datetime_taken.isoformat', call=True)
+    id = serpy.Field()
+    source_id = serpy.Field()
+    uri = serpy.Field(attr='get_absolute_url', call=True)
+    value = serpy.StrField()
+
+
+@lru_cache(maxsize=None)
+def get_reading_lean_serializer(fields: Tuple[str, ...]) -> Type[serpy.Serializer]:
+    """
+    Create a serializer with only the sent fields of the ReadingLeanSerializer, once per combination of fields
+    """
+    attrs = {name: field for name, field in ReadingLeanSerializer._field_map.items() if name in fields}
+    return type('ReadingLeanSerializer', (serpy.Serializer,), attrs)
@@ -59,3 +59,51 @@ APPLICATION_NAME = os.getenv('APPLICATION_NAME', f'{POD_NAME}_{ORG}_plot')
 CLOUDCIX_INFLUX_TAGS = {
     'service_name': APPLICATION_NAME,
 }
+
+# Readings
+PLOT_READING_BULK_LIMIT = int(os.getenv('PLOT_READING_BULK_LIMIT', 10000))
+# The number of Readings fetched from the server-side cursor at a time when exporting
+PLOT_READING_EXPORT_CHUNK_SIZE = int(os.getenv('PLOT_READING_EXPORT_CHUNK_SIZE', 5000))
+
+# Summaries
+# How Readings are aggregated into intervals when Reading Rollups cannot be used, "database" or "numpy"
+PLOT_SUMMARY_AGGREGATION = os.getenv('PLOT_SUMMARY_AGGREGATION', 'database')
+# The most intervals a Summary can be requested for
+PLOT_SUMMARY_MAX_BUCKETS = int(os.getenv('PLOT_SUMMARY_MAX_BUCKETS', 10000))
+
+# Lists
+# Above this many records the estimate and capped count modes stop counting exactly
+PLOT_COUNT_THRESHOLD = int(os.getenv('PLOT_COUNT_THRESHOLD', 10000))
+
+# Caches
+# Each cache is configured in the same format as an entry of Django's CACHES setting
+PLOT_ADDRESS_CACHE = {
+    'BACKEND': os.getenv('PLOT_ADDRESS_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+    'LOCATION': os.getenv('PLOT_ADDRESS_CACHE_LOCATION', 'plot_addresses'),
+    'TIMEOUT': int(os.getenv('PLOT_ADDRESS_CACHE_TIMEOUT', 300)),
+    'OPTIONS': {
+        'MAX_ENTRIES': int(os.getenv('PLOT_ADDRESS_CACHE_MAX_ENTRIES', 1000)),
+    },
+}
+PLOT_ADDRESS_MEMBER_CACHE = {
+    'BACKEND': os.getenv('PLOT_ADDRESS_MEMBER_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+    'LOCATION': os.getenv('PLOT_ADDRESS_MEMBER_CACHE_LOCATION', 'plot_address_members'),
+    'TIMEOUT': int(os.getenv('PLOT_ADDRESS_MEMBER_CACHE_TIMEOUT', 300)),
+    'OPTIONS': {
+        'MAX_ENTRIES': int(os.getenv('PLOT_ADDRESS_MEMBER_CACHE_MAX_ENTRIES', 10000)),
+    },
+}
+# The closed intervals of Source Summaries. Disabled unless a backend shared by every process is configured, e.g.
+# Redis, as writing a Reading in one process must invalidate the intervals cached by the others
+PLOT_SUMMARY_CACHE = {
+    'BACKEND': os.getenv('PLOT_SUMMARY_CACHE_BACKEND', 'django.core.cache.backends.dummy.DummyCache'),
+    'LOCATION': os.getenv('PLOT_SUMMARY_CACHE_LOCATION', 'plot_summaries'),
+    'TIMEOUT': int(os.getenv('PLOT_SUMMARY_CACHE_TIMEOUT', 3600)),
+    'OPTIONS': {
+        'MAX_ENTRIES': int(os.getenv('PLOT_SUMMARY_CACHE_MAX_ENTRIES', 10000)),
+    },
+}
+
+# Membership
+PLOT_ADDRESS_CONCURRENCY = int(os.getenv('PLOT_ADDRESS_CONCURRENCY', 8))
+PLOT_ADDRESS_PAGE_SIZE = int(os.getenv('PLOT_ADDRESS_PAGE_SIZE', 50))
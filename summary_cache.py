@@ -0,0 +1,174 @@
+"""
+Caching of the closed intervals of Source Summaries.
+
+An interval is closed once its end is in the past. Its result only changes when a Reading in it is written, so closed
+intervals are cached in PLOT_SUMMARY_CACHE and only the open interval, and any interval not yet cached, are calculated.
+The cache is only used with a backend shared by every process. With a local memory backend, a write in one process
+could not invalidate the intervals cached by the others, so nothing is cached.
+
+Invalidation is by version rather than by deleting keys. Each Source has a version for every day, which is replaced
+when a Reading taken on that day is created, updated or deleted, and a generation, which is replaced when Readings
+are removed in bulk by the retention policy. The key of an interval includes a fingerprint of the generation and the
+versions of the days it covers, so a write makes only the intervals containing the Reading miss the cache.
+Versions and generations are random tokens that are never reused, and a missing one is created with a new token, so
+a version that is evicted from the cache can never bring back an invalidated interval.
+"""
+# stdlib
+import hashlib
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+# libs
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+# local
+from plot.bucket_calendar import BucketCalendar
+from plot.utils import get_cache
+
+__all__ = [
+    'cache_buckets',
+    'get_cached_buckets',
+    'invalidate_summary_days',
+    'invalidate_summary_sources',
+]
+
+
+CACHE = 'PLOT_SUMMARY_CACHE'
+
+
+def get_shared_cache() -> Optional[BaseCache]:
+    """
+    The cache of Summary intervals, or None if PLOT_SUMMARY_CACHE is not shared by every process
+    """
+    cache = get_cache(CACHE)
+    if isinstance(cache, (DummyCache, LocMemCache)):
+        return None
+    return cache
+
+
+def get_generation_key(source_id: int) -> str:
+    return f'plot_summary_generation_{source_id}'
+
+
+def get_version_key(source_id: int, day: str) -> str:
+    return f'plot_summary_version_{source_id}_{day}'
+
+
+def get_days(start: datetime, end: datetime) -> List[str]:
+    """
+    List the days, in the current time zone, that an interval from start up to but not including end covers
+    """
+    day = timezone.localtime(start).date()
+    last_day = timezone.localtime(end - timedelta(microseconds=1)).date()
+    days = []
+    while day <= last_day:
+        days.append(day.isoformat())
+        day += timedelta(days=1)
+    return days
+
+
+def get_aware(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=dt_timezone.utc) if timezone.is_naive(dt) else dt
+
+
+def renew(keys: Iterable[str]):
+    """
+    Replace the versions or generations with new tokens
+    """
+    cache = get_shared_cache()
+    if cache is None:
+        return
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, timeout=None)
+
+
+def get_tokens(cache: BaseCache, keys: List[str]) -> Dict[str, str]:
+    """
+    Read the versions or generations, creating a new token for any that do not exist or were evicted
+    """
+    tokens = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in tokens}
+    if len(missing) > 0:
+        # A process racing to create the same token may overwrite it, which only causes misses as tokens are not reused
+        cache.set_many(missing, timeout=None)
+        tokens.update(missing)
+    return tokens
+
+
+def get_cached_buckets(
+        source_id: int,
+        aggregation: str,
+        calendar: BucketCalendar,
+) -> Tuple[Dict[int, Any], Dict[int, str]]:
+    """
+    Read the cached results of the closed intervals of a Source Summary
+    :param source_id: The id of the Source being summarised
+    :param aggregation: The name of the aggregate calculated for each interval, e.g. max or avg
+    :param calendar: The intervals being summarised
+    :return: The cached result of each interval by bucket index, and the cache key of each closed interval that was not
+             cached, by bucket index
+    """
+    cache = get_shared_cache()
+    if cache is None:
+        return {}, {}
+    now = timezone.now()
+    boundaries = calendar.boundaries
+    closed = {
+        i: get_days(boundaries[i - 1], boundaries[i])
+        for i in range(1, len(boundaries))
+        if boundaries[i] <= now
+    }
+    if len(closed) == 0:
+        return {}, {}
+
+    version_keys = {get_version_key(source_id, day) for days in closed.values() for day in days}
+    versions = get_tokens(cache, [get_generation_key(source_id), *sorted(version_keys)])
+    generation = versions[get_generation_key(source_id)]
+
+    keys = {}
+    for i, days in closed.items():
+        fingerprint = ','.join(versions[get_version_key(source_id, day)] for day in days)
+        digest = hashlib.md5(f'{generation}:{fingerprint}'.encode(), usedforsecurity=False).hexdigest()
+        keys[i] = (
+            f'plot_summary_{source_id}_{aggregation}_{boundaries[i - 1].isoformat()}_{boundaries[i].isoformat()}_'
+            f'{digest}'
+        )
+
+    cached = cache.get_many(keys.values())
+    results = {i: cached[key][0] for i, key in keys.items() if key in cached}
+    missing = {i: key for i, key in keys.items() if key not in cached}
+    return results, missing
+
+
+def cache_buckets(missing: Dict[int, str], results: Dict[int, Any]):
+    """
+    Cache the results calculated for the closed intervals that were not cached
+    :param missing: The cache key of each closed interval that was not cached, by bucket index
+    :param results: The result of each interval by bucket index. Intervals without a result have no Readings
+    """
+    cache = get_shared_cache()
+    if cache is None or len(missing) == 0:
+        return
+    # Results are wrapped so that intervals without Readings are also cached
+    cache.set_many({key: (results.get(i, None),) for i, key in missing.items()})
+
+
+def invalidate_summary_days(datetimes: Dict[int, Iterable[datetime]]):
+    """
+    Invalidate the cached intervals that contain Readings which were created, updated or deleted
+    :param datetimes: The datetime_taken of the changed Readings, by the id of their Source. For an update, both the
+                      previous and the new datetime_taken. Naive datetimes are taken to be in UTC, as Readings are sent.
+    """
+    renew({
+        get_version_key(source_id, timezone.localtime(get_aware(datetime_taken)).date().isoformat())
+        for source_id, datetimes_taken in datetimes.items()
+        for datetime_taken in datetimes_taken
+    })
+
+
+def invalidate_summary_sources(source_ids: Iterable[int]):
+    """
+    Invalidate all of the cached intervals of the Sources, e.g. when expired Readings are removed
+    """
+    renew({get_generation_key(source_id) for source_id in source_ids})
@@ -26,6 +26,21 @@ urlpatterns = [
         views.ReadingCollection.as_view(),
         name='reading_collection',
     ),
+    path(
+        'reading/bulk/',
+        views.ReadingBulkCollection.as_view(),
+        name='reading_bulk_collection',
+    ),
+    path(
+        'reading/export/',
+        views.ReadingExportCollection.as_view(),
+        name='reading_export_collection',
+    ),
+    path(
+        'reading/load/',
+        views.ReadingLoadCollection.as_view(),
+        name='reading_load_collection',
+    ),
     path(
         'reading/<int:pk>/',
         views.ReadingResource.as_view(),
@@ -1,69 +1,211 @@
 # stdlib
-from typing import List
+import base64
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from datetime import datetime
+from math import ceil
+from typing import List, Optional, Tuple, Union
 # libs
 from cloudcix.api.membership import Membership
-from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache.backends.base import BaseCache
+from django.db.models import QuerySet
+from django.urls import get_script_prefix, reverse
+from django.utils.module_loading import import_string
 from jaeger_client import Span
+from requests import Response
 from rest_framework.request import Request
 # local
 
 
+@lru_cache(maxsize=None)
+def get_cache(name: str) -> BaseCache:
+    """
+    Create the cache described by the named setting, once per process.
+    The setting is a dictionary in the same format as an entry of Django's CACHES setting, so the cache can use any of
+    Django's backends, e.g. local memory, file based or database.
+    """
+    params = dict(getattr(settings, name))
+    backend = params.pop('BACKEND')
+    location = params.pop('LOCATION', '')
+    return import_string(backend)(location, params)
+
+
+# The hits and misses of the Address Member cache in this process, reported as tags on the span of each lookup
+address_member_cache_stats: Counter = Counter()
+
+
+def get_member_for_address(request: Request, address_id: int, span: Span) -> Optional[int]:
+    """
+    Find the id of the Member that an Address belongs to.
+    The Member of each Address is cached for PLOT_ADDRESS_MEMBER_CACHE['TIMEOUT'] seconds, otherwise a request is made
+    to Membership to read the Address.
+    :return: The id of the Member, or None if the Address could not be read
+    """
+    cache = get_cache('PLOT_ADDRESS_MEMBER_CACHE')
+    key = f'plot_address_member_{address_id}'
+    member_id = cache.get(key)
+    if member_id is not None:
+        address_member_cache_stats['hits'] += 1
+    else:
+        address_member_cache_stats['misses'] += 1
+        response = Membership.address.read(
+            token=request.user.token,
+            pk=address_id,
+            span=span,
+        )
+        if response.status_code == 200:
+            member_id = response.json()['content']['member']['id']
+            cache.set(key, member_id)
+    span.set_tag('address_member_cache_hits', address_member_cache_stats['hits'])
+    span.set_tag('address_member_cache_misses', address_member_cache_stats['misses'])
+    return member_id
+
+
 def get_addresses_in_member(request: Request, span: Span) -> List[int]:
     """
-    Given a token, make requests to Membership to fetch all the Addresses in the Member that the token is from
+    Fetch all the Addresses in the Member that the token is from.
+    The Addresses are cached per Member for PLOT_ADDRESS_CACHE['TIMEOUT'] seconds, otherwise requests are made to
+    Membership to fetch them. Addresses are added to and removed from Members in Membership, so the cache is never
+    invalidated here and a change is seen once the cached entry expires.
+    The first page gives the total number of Addresses, and the remaining pages are fetched concurrently, up to
+    PLOT_ADDRESS_CONCURRENCY at a time. If any page cannot be fetched only the User's own Address is returned.
     """
+    cache = get_cache('PLOT_ADDRESS_CACHE')
+    key = f'plot_member_addresses_{request.user.member["id"]}'
+    address_ids = cache.get(key)
+    span.set_tag('address_cache_hit', address_ids is not None)
+    if address_ids is not None:
+        return address_ids
+
+    limit = settings.PLOT_ADDRESS_PAGE_SIZE
     params = {
         'page': 0,
-        'limit': 50,
+        'limit': limit,
         'search[member_id]': request.user.member['id'],
     }
-    response = Membership.address.list(
-        token=request.user.token,
-        params=params,
-        span=span,
-    )
-    if response.status_code == 200:
-        address_ids = [a['id'] for a in response.json()['content']]
-        total_records = response.json()['_metadata']['total_records']
-        while len(address_ids) < total_records:  # pragma: no cover
-            params['page'] += 1
-            response = Membership.address.list(
-                token=request.user.token,
-                params=params,
-                span=span,
-            )
+
+    def list_page(page: int) -> Response:
+        return Membership.address.list(
+            token=request.user.token,
+            params={**params, 'page': page},
+            span=span,
+        )
+
+    response = list_page(0)
+    if response.status_code != 200:  # no pragma
+        return [request.user.address_id]
+
+    address_ids = [a['id'] for a in response.json()['content']]
+    total_records = response.json()['_metadata']['total_records']
+    pages = range(1, ceil(total_records / limit))
+    if len(pages) > 0:  # pragma: no cover
+        with ThreadPoolExecutor(max_workers=min(settings.PLOT_ADDRESS_CONCURRENCY, len(pages))) as executor:
+            # map returns the responses in the order of the pages
+            responses = list(executor.map(list_page, pages))
+        span.set_tag('address_pages', len(pages) + 1)
+        for response in responses:
+            if response.status_code != 200:
+                return [request.user.address_id]
             address_ids.extend([a['id'] for a in response.json()['content']])
-    else:  # no pragma
-        address_ids = [request.user.address_id]
 
+    cache.set(key, address_ids)
     return address_ids
 
 
-def get_date_list(start_date, end_date, frequency, period):
-    date_list = []
-    # As filter uses `gt`, use previous day as first in the list
-    curr_date = start_date - relativedelta(days=1)
-    if period == 'd':
-        # day
-        while curr_date < end_date:
-            date_list.append(str(curr_date.date()))
-            curr_date += relativedelta(days=frequency)
-    elif period == 'm':
-        # month
-        while curr_date < end_date:
-            date_list.append(str(curr_date.date()))
-            curr_date += relativedelta(day=31, months=+frequency)
-    elif period == 'q':
-        # quarter
-        while curr_date < end_date:
-            date_list.append(str(curr_date.date()))
-            curr_date += relativedelta(day=31, months=+3 * frequency)
-    else:
-        # year
-        while curr_date < end_date:
-            date_list.append(str(curr_date.date()))
-            curr_date += relativedelta(day=31, month=12, years=+frequency)
+# A pk that does not appear in any URL of the app, used to find where the pk goes in the URL of a Resource view
+URI_PK_PLACEHOLDER = 918273645546372819
+
+
+@lru_cache(maxsize=None)
+def get_uri_template(name: str, prefix: str) -> str:
+    """
+    Reverse the URL of a Resource view once per script prefix, as a template with a "{pk}" placeholder
+    :param name: The name of the URL of the Resource view, e.g. reading_resource
+    :param prefix: The script prefix the URL is reversed with
+    """
+    uri = reverse(name, kwargs={'pk': URI_PK_PLACEHOLDER})
+    return uri.replace(str(URI_PK_PLACEHOLDER), '{pk}')
 
-    date_list.append(str(end_date.date()))
 
-    return date_list
+def get_resource_uri(name: str, pk: int) -> str:
+    """
+    Generate the URL of a Resource view for a record, as reverse(name, kwargs={'pk': pk}) would, by formatting the
+    cached template for the URL instead of resolving it each time
+    """
+    return get_uri_template(name, get_script_prefix()).format(pk=pk)
+
+
+def encode_cursor(datetime_taken: datetime, pk: int) -> str:
+    """
+    Generate an opaque cursor for the position of a Reading in a list ordered by -datetime_taken and -id
+    """
+    position = json.dumps([datetime_taken.isoformat(), pk])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+    """
+    Read the position of a Reading from a cursor generated by encode_cursor
+    :return: The datetime_taken and id of the Reading, or None for an empty cursor
+    :raises ValueError: If the cursor is invalid
+    """
+    if cursor == '':
+        return None
+    try:
+        datetime_taken, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(datetime_taken), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError(f'Invalid cursor: {cursor}')
+
+
+# The values of the "count" parameter of the list methods
+COUNT_MODES = ('capped', 'estimate', 'exact')
+
+
+def get_total_records(objs: QuerySet, mode: str, span: Span) -> Union[int, str]:
+    """
+    Count the records for the _metadata of a list, in the mode requested in the "count" parameter:
+        - exact: COUNT(*) over the queryset
+        - estimate: The row estimate of the query planner, or an exact count if it estimates fewer rows than
+          PLOT_COUNT_THRESHOLD
+        - capped: An exact count up to PLOT_COUNT_THRESHOLD, returned as e.g. "10000+" when there are more records
+    :raises ValueError: If the mode is not one of COUNT_MODES
+    """
+    if mode not in COUNT_MODES:
+        raise ValueError(f'Invalid count mode: {mode}')
+    threshold = settings.PLOT_COUNT_THRESHOLD
+    span.set_tag('count_mode', mode)
+    if mode == 'estimate':
+        plan = json.loads(objs.explain(format='json'))
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+        if estimate >= threshold:
+            return estimate
+    elif mode == 'capped':
+        total_records = objs[:threshold + 1].count()
+        if total_records > threshold:
+            return f'{threshold}+'
+        return total_records
+    return objs.count()
+
+
+def get_fieldset(value: Optional[str], allowed: Tuple[str, ...], default: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    Read a comma separated list of names from a "fields" or "expand" parameter
+    :param value: The value of the parameter, or None if it was not sent
+    :param allowed: The names that can be sent
+    :param default: The names used when the parameter is not sent
+    :return: The sent names, in the order of allowed
+    :raises ValueError: If no names or a name that is not allowed is sent
+    """
+    if value is None:
+        return default
+    names = {name.strip() for name in value.split(',') if name.strip() != ''}
+    if len(names) == 0:
+        raise ValueError('No names sent')
+    invalid = names.difference(allowed)
+    if len(invalid) > 0:
+        raise ValueError(f'Invalid names: {", ".join(sorted(invalid))}')
+    return tuple(name for name in allowed if name in names)
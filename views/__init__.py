@@ -1,6 +1,12 @@
 from .alert import AlertCollection
 from .category import CategoryCollection, CategoryResource
-from .reading import ReadingCollection, ReadingResource
+from .reading import (
+    ReadingBulkCollection,
+    ReadingCollection,
+    ReadingExportCollection,
+    ReadingLoadCollection,
+    ReadingResource,
+)
 from .source import SourceCollection, SourceResource
 from .source_group_summary import SourceGroupSummaryCollection
 from .source_share import SourceShareCollection, SourceShareResource
@@ -14,7 +20,10 @@ __all__ = [
     'CategoryCollection',
     'CategoryResource',
     # Reading
+    'ReadingBulkCollection',
     'ReadingCollection',
+    'ReadingExportCollection',
+    'ReadingLoadCollection',
     'ReadingResource',
     # Source
     'SourceCollection',
@@ -2,15 +2,18 @@
 Management of Alert service
 """
 # libs
+from cloudcix_rest.exceptions import Http400
 from cloudcix_rest.views import APIView
 from django.conf import settings
 from django.db.models import Q
 from rest_framework.request import Request
 from rest_framework.response import Response
 # local
-from ..models import Reading
-from ..serializers import ReadingSerializer
-from plot.utils import get_addresses_in_member
+from ..models import SourceLatestReading
+from ..models.source_latest_reading import ALERT_LEVELS
+from ..serializers import get_reading_lean_serializer, ReadingSerializer, SourceSerializer
+from ..serializers.reading import READING_LEAN_DEFAULT_FIELDS, READING_LEAN_FIELDS
+from plot.utils import get_addresses_in_member, get_fieldset
 
 
 class AlertCollection(APIView):
@@ -23,7 +26,13 @@ class AlertCollection(APIView):
 
         description: |
             Based on the latest Reading for each source, determines if it is a red or amber alert to return in
-            response.
+            response. The latest Reading for each Source, and its alert level, are maintained as Readings are created,
+            updated and deleted, and as the thresholds of Sources are updated.
+
+            Send the "fields" parameter, a comma separated list of "datetime_taken", "id", "source_id", "uri" and
+            "value", to return flat Reading records with only those fields instead of nesting the Source in each one.
+            Send the "expand" parameter as "source" to return each Source of the Readings once, in "sources". Flat
+            records have the fields "datetime_taken", "id", "source_id" and "value" when only "expand" is sent.
 
         responses:
             200:
@@ -43,10 +52,21 @@ class AlertCollection(APIView):
                                     $ref: '#/components/schemas/Reading'
                                 red_low_alerts:
                                    $ref: '#/components/schemas/Reading'
-
+            400: {}
         """
         tracer = settings.TRACER
 
+        with tracer.start_span('validating_fieldsets', child_of=request.span):
+            lean = 'fields' in request.GET or 'expand' in request.GET
+            try:
+                fields = get_fieldset(request.GET.get('fields'), READING_LEAN_FIELDS, READING_LEAN_DEFAULT_FIELDS)
+            except ValueError:
+                return Http400(error_code='plot_alert_list_001')
+            try:
+                expand = get_fieldset(request.GET.get('expand'), ('source',), ())
+            except ValueError:
+                return Http400(error_code='plot_alert_list_002')
+
         with tracer.start_span('set_address_filtering', child_of=request.span) as span:
             addresses = [request.user.address['id']]
             if request.user.is_global and request.user.global_active:
@@ -59,43 +79,31 @@ class AlertCollection(APIView):
             )
 
         with tracer.start_span('get_reading_objects', child_of=request.span):
-            readings = Reading.objects.filter(
+            # The alert level is classified when the latest Reading or the thresholds of its Source change
+            latest_readings = SourceLatestReading.objects.filter(
                 address_filtering,
+                alert_level__in=ALERT_LEVELS,
                 source__deleted__isnull=True,
-            ).order_by('source_id', '-datetime_taken').distinct('source_id')
+            ).order_by('-datetime_taken').distinct()
 
-        with tracer.start_span('compare values', child_of=request.span):
-            amber_high_alerts, amber_low_alerts, green_alerts, red_high_alerts, red_low_alerts = [], [], [], [], []
-            for reading in readings:
-                if not reading.source.accumulating:
-                    if reading.value <= reading.source.red_low:
-                        red_low_alerts.append(reading)
-                    elif reading.value >= reading.source.red_high:
-                        red_high_alerts.append(reading)
-                    elif reading.value <= reading.source.amber_low:
-                        amber_low_alerts.append(reading)
-                    elif reading.value >= reading.source.amber_high:
-                        amber_high_alerts.append(reading)
-                    else:
-                        green_alerts.append(reading)
-
-            alerts = [
-                amber_high_alerts,
-                amber_low_alerts,
-                green_alerts,
-                red_high_alerts,
-                red_low_alerts,
-            ]
-            for item in alerts:
-                item.sort(key=lambda x: x.datetime_taken, reverse=True)
+        with tracer.start_span('group_by_alert_level', child_of=request.span):
+            alerts = {alert_level: [] for alert_level in ALERT_LEVELS}
+            sources = {}
+            for latest_reading in latest_readings:
+                alerts[latest_reading.alert_level].append(latest_reading.get_reading())
+                sources[latest_reading.source_id] = latest_reading.source
 
         with tracer.start_span('get_data', child_of=request.span):
+            serializer = get_reading_lean_serializer(fields) if lean else ReadingSerializer
             data = {
-                'amber_high_alerts': ReadingSerializer(instance=amber_high_alerts, many=True).data,
-                'amber_low_alerts': ReadingSerializer(instance=amber_low_alerts, many=True).data,
-                'green_alerts': ReadingSerializer(instance=green_alerts, many=True).data,
-                'red_high_alerts': ReadingSerializer(instance=red_high_alerts, many=True).data,
-                'red_low_alerts': ReadingSerializer(instance=red_low_alerts, many=True).data,
+                f'{alert_level}_alerts': serializer(instance=readings, many=True).data
+                for alert_level, readings in alerts.items()
             }
 
-        return Response({'content': data})
+        if 'source' not in expand:
+            return Response({'content': data})
+
+        with tracer.start_span('serializing_sources', child_of=request.span):
+            source_data = SourceSerializer(instance=list(sources.values()), many=True).data
+
+        return Response({'content': data, 'sources': source_data})
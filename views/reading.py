@@ -8,24 +8,34 @@ from cloudcix_rest.exceptions import Http400, Http404
 from cloudcix_rest.views import APIView
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import DatabaseError, IntegrityError, router, transaction
 from django.db.models import Q
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.request import Request
 from rest_framework.response import Response
 # local
+from plot.bulk_load import copy_readings
 from plot.controllers import (
+    ReadingBulkCreateController,
     ReadingCreateController,
     ReadingListController,
     ReadingUpdateController,
 )
-from plot.models import Reading
+from plot.export import CONTENT_TYPES, export_readings, VALUE_TYPES
+from plot.models import Reading, ReadingRollup, Source, SourceLatestReading
 from plot.permissions.reading import Permissions
-from plot.serializers import ReadingSerializer
-from plot.utils import get_addresses_in_member
+from plot.serializers import get_reading_lean_serializer, ReadingSerializer, SourceSerializer
+from plot.serializers.reading import READING_LEAN_DEFAULT_FIELDS, READING_LEAN_FIELDS
+from plot.summary_cache import invalidate_summary_days
+from plot.utils import decode_cursor, encode_cursor, get_addresses_in_member, get_fieldset, get_total_records
 
 
 __all__ = [
+    'ReadingBulkCollection',
     'ReadingCollection',
+    'ReadingExportCollection',
+    'ReadingLoadCollection',
     'ReadingResource',
 ]
 
@@ -42,6 +52,20 @@ class ReadingCollection(APIView):
         description: |
             Retrieve a list of the Reading records from Sources and Shared Sources for the user.
 
+            Send the "cursor" parameter to paginate by cursor instead of by page, which stays fast for pages deep into
+            the list. Readings are then ordered by "-datetime_taken" and "-id". Send an empty "cursor" for the first
+            page, and the "next" value from the "_metadata" of the response for each following page. "next" is null
+            on the last page. "total_records" is null in cursor mode unless "count" is sent.
+
+            Send the "count" parameter as "estimate" to use the row estimate of the query planner for "total_records"
+            in "_metadata", or as "capped" to stop counting at a threshold, e.g. "10000+". Both modes count exactly
+            below the threshold. Defaults to "exact".
+
+            Send the "fields" parameter, a comma separated list of "datetime_taken", "id", "source_id", "uri" and
+            "value", to return flat Reading records with only those fields instead of nesting the Source in each one.
+            Send the "expand" parameter as "source" to return each Source of the Readings once, in "sources". Flat
+            records have the fields "datetime_taken", "id", "source_id" and "value" when only "expand" is sent.
+
         responses:
             200:
                 description: A list of the Reading records, filtered and ordered by the User
@@ -77,27 +101,87 @@ class ReadingCollection(APIView):
             except (ValueError, ValidationError):
                 return Http400(error_code='plot_reading_list_001')
 
-        with tracer.start_span('generating_metadata', child_of=request.span):
+        with tracer.start_span('validating_fieldsets', child_of=request.span):
+            lean = 'fields' in request.GET or 'expand' in request.GET
+            try:
+                fields = get_fieldset(request.GET.get('fields'), READING_LEAN_FIELDS, READING_LEAN_DEFAULT_FIELDS)
+            except ValueError:
+                return Http400(error_code='plot_reading_list_003')
+            try:
+                expand = get_fieldset(request.GET.get('expand'), ('source',), ())
+            except ValueError:
+                return Http400(error_code='plot_reading_list_004')
+            if lean:
+                # Flat records only need the columns of the reading table
+                objs = objs.select_related(None).only('datetime_taken', 'id', 'source_id', 'value')
+
+        with tracer.start_span('generating_metadata', child_of=request.span) as span:
             limit = controller.cleaned_data['limit']
-            order = controller.cleaned_data['order']
-            page = controller.cleaned_data['page']
-            total_records = objs.count()
             warnings = controller.warnings
-            metadata = {
-                'limit': limit,
-                'order': order,
-                'page': page,
-                'total_records': total_records,
-                'warnings': warnings,
-            }
-            objs = objs[page * limit:(page + 1) * limit]
+            if 'cursor' in request.GET:
+                try:
+                    position = decode_cursor(request.GET['cursor'])
+                except ValueError:
+                    return Http400(error_code='plot_reading_list_002')
+                total_records = None
+                if 'count' in request.GET:
+                    try:
+                        total_records = get_total_records(objs, request.GET['count'], span)
+                    except ValueError:
+                        return Http400(error_code='plot_reading_list_005')
+                objs = objs.order_by('-datetime_taken', '-id')
+                if position is not None:
+                    datetime_taken, pk = position
+                    objs = objs.filter(
+                        Q(datetime_taken__lt=datetime_taken) | Q(datetime_taken=datetime_taken, id__lt=pk),
+                    )
+                # Fetch one extra Reading to find out if there is a next page
+                objs = list(objs[:limit + 1])
+                next_cursor = None
+                if len(objs) > limit:
+                    objs = objs[:limit]
+                    next_cursor = encode_cursor(objs[-1].datetime_taken, objs[-1].pk)
+                metadata = {
+                    'cursor': request.GET['cursor'],
+                    'limit': limit,
+                    'next': next_cursor,
+                    'order': '-datetime_taken',
+                    'total_records': total_records,
+                    'warnings': warnings,
+                }
+            else:
+                order = controller.cleaned_data['order']
+                page = controller.cleaned_data['page']
+                try:
+                    total_records = get_total_records(objs, request.GET.get('count', 'exact'), span)
+                except ValueError:
+                    return Http400(error_code='plot_reading_list_005')
+                metadata = {
+                    'limit': limit,
+                    'order': order,
+                    'page': page,
+                    'total_records': total_records,
+                    'warnings': warnings,
+                }
+                objs = objs[page * limit:(page + 1) * limit]
 
         # Serializing items and returning response
         with tracer.start_span('serializing_data', child_of=request.span) as span:
-            span.set_tag('num_objects', objs.count())
-            data = ReadingSerializer(instance=objs, many=True).data
+            if lean:
+                data = get_reading_lean_serializer(fields)(instance=objs, many=True).data
+            else:
+                data = ReadingSerializer(instance=objs, many=True).data
+            span.set_tag('num_objects', len(data))
+
+        if 'source' not in expand:
+            return Response({'content': data, '_metadata': metadata})
 
-        return Response({'content': data, '_metadata': metadata})
+        with tracer.start_span('serializing_sources', child_of=request.span) as span:
+            sources = Source.objects.filter(pk__in={obj.source_id for obj in objs})
+            source_data = SourceSerializer(instance=sources, many=True).data
+            span.set_tag('num_objects', len(source_data))
+
+        return Response({'content': data, '_metadata': metadata, 'sources': source_data})
 
     def post(self, request: Request) -> Response:
         """
@@ -125,7 +209,15 @@ class ReadingCollection(APIView):
                 return Http400(errors=controller.errors)
 
         with tracer.start_span('saving_object', child_of=request.span):
-            controller.instance.save()
+            try:
+                with transaction.atomic(using=router.db_for_write(Reading)):
+                    controller.instance.save()
+            except IntegrityError:
+                # A Reading for the Source at the datetime_taken was created after the controller checked
+                return Http400(error_code='plot_reading_create_106')
+            SourceLatestReading.objects.refresh([controller.instance.source_id], created=True)
+            ReadingRollup.objects.refresh_readings([controller.instance])
+            invalidate_summary_days({controller.instance.source_id: [controller.instance.datetime_taken]})
 
         with tracer.start_span('serializing_data', child_of=request.span):
             data = ReadingSerializer(instance=controller.instance).data
@@ -133,6 +225,207 @@ class ReadingCollection(APIView):
         return Response({'content': data}, status=status.HTTP_201_CREATED)
 
 
+class ReadingBulkCollection(APIView):
+    """
+    Handles methods regarding many Reading records in a single request, i.e. bulk create
+    """
+
+    def post(self, request: Request) -> Response:
+        """
+        summary: Create many new Reading records
+
+        description: |
+            Create many new Reading records for Sources in the requesting User's Address, using the list of Readings
+            supplied by the User. Valid Readings are created even if other Readings in the request are invalid.
+            Invalid Readings are returned in "errors", keyed by their index in the sent list.
+
+        responses:
+            201:
+                description: The valid Reading records were created successfully
+                content:
+                    application/json:
+                        schema:
+                            type: object
+                            properties:
+                                created:
+                                    description: The number of Reading records created.
+                                    type: integer
+                                errors:
+                                    description: The error code for each invalid Reading, keyed by its index.
+                                    type: object
+            400: {}
+            403: {}
+        """
+        tracer = settings.TRACER
+
+        with tracer.start_span('checking_permissions', child_of=request.span):
+            err = Permissions.bulk_create(request)
+            if err is not None:
+                return err
+
+        with tracer.start_span('validating_controller', child_of=request.span) as span:
+            controller = ReadingBulkCreateController(data=request.data, request=request, span=span)
+            if not controller.is_valid():
+                return Http400(errors=controller.errors)
+
+        with tracer.start_span('saving_objects', child_of=request.span) as span:
+            try:
+                with transaction.atomic(using=router.db_for_write(Reading)):
+                    objs = Reading.objects.bulk_create(controller.cleaned_data['readings'], batch_size=1000)
+            except IntegrityError:
+                # A Reading in the batch was created by another request after it was validated
+                return Http400(error_code='plot_reading_bulk_create_104')
+            span.set_tag('num_objects', len(objs))
+            SourceLatestReading.objects.refresh({obj.source_id for obj in objs}, created=True)
+            ReadingRollup.objects.refresh_readings(objs)
+            datetimes = {}
+            for obj in objs:
+                datetimes.setdefault(obj.source_id, []).append(obj.datetime_taken)
+            invalidate_summary_days(datetimes)
+
+        content = {
+            'created': len(objs),
+            'errors': controller.row_errors,
+        }
+        return Response({'content': content}, status=status.HTTP_201_CREATED)
+
+
+class ReadingExportCollection(APIView):
+    """
+    Handles streaming large numbers of Reading records as CSV or NDJSON, i.e. export
+    """
+
+    def get(self, request: Request) -> StreamingHttpResponse:
+        """
+        summary: Export Reading records as a CSV, NDJSON, Arrow or Parquet file
+
+        description: |
+            Stream the Reading records from Sources and Shared Sources for the user, in a single response, without
+            pagination. Readings are filtered by the same search parameters as the list method, e.g. "source_id__in",
+            "datetime_taken__gte" and "datetime_taken__lt", and ordered by "source_id" and "datetime_taken".
+
+            Send the "file_format" parameter as "csv" for CSV with a header row of source_id,datetime_taken,value, or
+            as "ndjson" for an object with source_id, datetime_taken and value on each line. Defaults to "ndjson".
+            Both formats can be sent to the load method.
+
+            Send the "file_format" parameter as "arrow" for an Apache Arrow IPC stream, or as "parquet" for a Parquet
+            file, with the typed columns source_id (int64), datetime_taken (timestamp in UTC) and value. Send the
+            "value_type" parameter as "float" for a float64 value column instead of the default "decimal", a
+            decimal128(10, 2) column.
+
+        responses:
+            200:
+                description: The Reading records, filtered by the User
+                content:
+                    application/vnd.apache.arrow.stream: {}
+                    application/vnd.apache.parquet: {}
+                    application/x-ndjson: {}
+                    text/csv: {}
+            400: {}
+        """
+        tracer = settings.TRACER
+
+        with tracer.start_span('validating_controller', child_of=request.span) as span:
+            controller = ReadingListController(data=request.GET, request=request, span=span)
+            controller.is_valid()
+            file_format = request.GET.get('file_format', 'ndjson')
+            if file_format not in CONTENT_TYPES:
+                return Http400(error_code='plot_reading_export_001')
+            value_type = request.GET.get('value_type', 'decimal')
+            if value_type not in VALUE_TYPES:
+                return Http400(error_code='plot_reading_export_003')
+
+        with tracer.start_span('set_address_filtering', child_of=request.span) as span:
+            addresses = [request.user.address['id']]
+            if request.user.is_global and request.user.global_active:
+                addresses = get_addresses_in_member(request, span)
+            # Export readings for Sources where address is in Category or Source Share. The Sources are filtered in a
+            # subquery so a Source in both is not exported twice
+            sources = Source.objects.filter(
+                Q(category__address_id__in=addresses) | Q(shares__address_id__in=addresses),
+            ).values('pk')
+
+        with tracer.start_span('get_objects', child_of=request.span):
+            try:
+                objs = Reading.objects.filter(
+                    source_id__in=sources,
+                    **controller.cleaned_data['search'],
+                ).exclude(
+                    **controller.cleaned_data['exclude'],
+                ).select_related(None).order_by(
+                    'source_id',
+                    'datetime_taken',
+                )
+            except (ValueError, ValidationError):
+                return Http400(error_code='plot_reading_export_002')
+
+        # The Readings are read from the database as the response is sent
+        return StreamingHttpResponse(
+            export_readings(objs, file_format, value_type),
+            content_type=CONTENT_TYPES[file_format],
+        )
+
+
+class ReadingLoadCollection(APIView):
+    """
+    Handles loading large numbers of Reading records from a CSV or NDJSON request body, i.e. load
+    """
+    content_types = {
+        'application/ndjson': 'ndjson',
+        'application/x-ndjson': 'ndjson',
+        'text/csv': 'csv',
+    }
+
+    def post(self, request: Request) -> Response:
+        """
+        summary: Load Reading records from a CSV or NDJSON file
+
+        description: |
+            Stream Reading records for Sources in the requesting User's Address into the database using PostgreSQL
+            COPY. The request body is either CSV, with the Content-Type text/csv and a header row of
+            source_id,datetime_taken,value, or NDJSON, with the Content-Type application/x-ndjson and an object with
+            source_id, datetime_taken and value on each line. Readings for Sources outside the User's Address, in the
+            future, or that already exist for the Source at that datetime_taken are skipped.
+
+        responses:
+            201:
+                description: The Reading records were loaded successfully
+                content:
+                    application/json:
+                        schema:
+                            type: object
+                            properties:
+                                created:
+                                    description: The number of Reading records created.
+                                    type: integer
+                                received:
+                                    description: The number of rows received in the request body.
+                                    type: integer
+            400: {}
+            403: {}
+        """
+        tracer = settings.TRACER
+
+        with tracer.start_span('checking_permissions', child_of=request.span):
+            err = Permissions.load(request)
+            if err is not None:
+                return err
+
+        with tracer.start_span('validating_content_type', child_of=request.span):
+            file_format = self.content_types.get(request.content_type.split(';')[0].strip().lower(), None)
+            if file_format is None:
+                return Http400(error_code='plot_reading_load_001')
+
+        with tracer.start_span('copying_objects', child_of=request.span) as span:
+            try:
+                received, created = copy_readings(request.stream, file_format, request.user.address['id'])
+            except (DatabaseError, KeyError, TypeError, ValueError):
+                return Http400(error_code='plot_reading_load_002')
+            span.set_tag('num_objects', created)
+
+        return Response({'content': {'created': created, 'received': received}}, status=status.HTTP_201_CREATED)
+
+
 class ReadingResource(APIView):
     """
     Handles methods regarding Reading records that do require an id to be specified, i.e. read, update, delete
@@ -206,6 +499,8 @@ class ReadingResource(APIView):
                 return err
 
         with tracer.start_span('validating_controller', child_of=request.span) as span:
+            # The rollups for the bucket the Reading was in before the update are also recalculated
+            previous_datetime_taken = obj.datetime_taken
             controller = ReadingUpdateController(
                 instance=obj,
                 data=request.data,
@@ -217,7 +512,16 @@ class ReadingResource(APIView):
                 return Http400(errors=controller.errors)
 
         with tracer.start_span('saving_object', child_of=request.span):
-            controller.instance.save()
+            try:
+                with transaction.atomic(using=router.db_for_write(Reading)):
+                    controller.instance.save()
+            except IntegrityError:
+                # A Reading for the Source at the datetime_taken was created after the controller checked
+                return Http400(error_code='plot_reading_update_103')
+            SourceLatestReading.objects.refresh([controller.instance.source_id])
+            datetimes_taken = (previous_datetime_taken, controller.instance.datetime_taken)
+            ReadingRollup.objects.refresh({controller.instance.source_id: (min(datetimes_taken), max(datetimes_taken))})
+            invalidate_summary_days({controller.instance.source_id: datetimes_taken})
 
         with tracer.start_span('serializing_data', child_of=request.span):
             data = ReadingSerializer(instance=controller.instance).data
@@ -267,5 +571,8 @@ class ReadingResource(APIView):
         with tracer.start_span('saving_object', child_of=request.span):
             obj.deleted = datetime.now()
             obj.save()
+            SourceLatestReading.objects.refresh([obj.source_id])
+            ReadingRollup.objects.refresh_readings([obj])
+            invalidate_summary_days({obj.source_id: [obj.datetime_taken]})
 
         return Response(status=status.HTTP_204_NO_CONTENT)
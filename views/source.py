@@ -17,10 +17,10 @@ from plot.controllers import (
     SourceListController,
     SourceUpdateController,
 )
-from plot.models import Source
+from plot.models import Source, SourceLatestReading
 from plot.permissions.source import Permissions
 from plot.serializers import SourceSerializer
-from plot.utils import get_addresses_in_member
+from plot.utils import get_addresses_in_member, get_total_records
 
 
 __all__ = [
@@ -40,6 +40,10 @@ class SourceCollection(APIView):
         description: |
             Retrieve a list of the Source records for the requesting User.
 
+            Send the "count" parameter as "estimate" to use the row estimate of the query planner for "total_records"
+            in "_metadata", or as "capped" to stop counting at a threshold, e.g. "10000+". Both modes count exactly
+            below the threshold. Defaults to "exact".
+
         responses:
             200:
                 description: A list of the source records, filtered and ordered by the User
@@ -72,11 +76,14 @@ class SourceCollection(APIView):
             except (ValueError, ValidationError):
                 return Http400(error_code='plot_source_list_001')
 
-        with tracer.start_span('generating_metadata', child_of=request.span):
+        with tracer.start_span('generating_metadata', child_of=request.span) as span:
             limit = controller.cleaned_data['limit']
             order = controller.cleaned_data['order']
             page = controller.cleaned_data['page']
-            total_records = objs.count()
+            try:
+                total_records = get_total_records(objs, request.GET.get('count', 'exact'), span)
+            except ValueError:
+                return Http400(error_code='plot_source_list_002')
             warnings = controller.warnings
             metadata = {
                 'limit': limit,
@@ -89,8 +96,8 @@ class SourceCollection(APIView):
 
         # Serializing items and returning response
         with tracer.start_span('serializing_data', child_of=request.span) as span:
-            span.set_tag('num_objects', objs.count())
             data = SourceSerializer(instance=objs, many=True).data
+            span.set_tag('num_objects', len(data))
 
         return Response({'content': data, '_metadata': metadata})
 
@@ -153,8 +160,8 @@ class SourceResource(APIView):
             except Source.DoesNotExist:
                 return Http404(error_code='plot_source_read_001')
 
-        with tracer.start_span('checking_permissions', child_of=request.span):
-            err = Permissions.read(request, obj)
+        with tracer.start_span('checking_permissions', child_of=request.span) as span:
+            err = Permissions.read(request, obj, span)
             if err is not None:
                 return err
 
@@ -205,6 +212,8 @@ class SourceResource(APIView):
 
         with tracer.start_span('saving_object', child_of=request.span):
             controller.instance.save()
+            # The thresholds may have changed, so reclassify the latest Reading
+            SourceLatestReading.objects.evaluate(controller.instance)
 
         with tracer.start_span('serializing_data', child_of=request.span):
             data = SourceSerializer(instance=controller.instance).data
@@ -247,5 +256,6 @@ class SourceResource(APIView):
 
         with tracer.start_span('saving_object', child_of=request.span):
             obj.cascade_delete()
+            SourceLatestReading.objects.refresh([obj.pk])
 
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -8,13 +8,16 @@ from dateutil import parser
 from cloudcix_rest.exceptions import Http400
 from cloudcix_rest.views import APIView
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Avg, DecimalField, ExpressionWrapper, Max, Min, Q, Sum
 from rest_framework.request import Request
 from rest_framework.response import Response
 # local
+from plot.aggregation import get_bucket_aggregates, get_rollup_granularity
+from plot.aggregation_numpy import get_bucket_aggregates_numpy
+from plot.bucket_calendar import get_bucket_calendar, get_bucket_count, INTERVAL, PERIODS
 from plot.controllers import SourceGroupSummaryListController
-from plot.models import Reading, Source, Unit
-from plot.utils import get_addresses_in_member, get_date_list
+from plot.models import Reading, ReadingRollup, Source, Unit
+from plot.utils import get_addresses_in_member
 
 
 __all__ = [
@@ -31,7 +34,11 @@ class SourceGroupSummaryCollection(APIView):
         """
         summary: Calculate the daily values of Readings for a Source Group for a date range
 
-        description: Summary report of readings for a Source Group calculated based on interval in request.
+        description: |
+            Summary report of readings for a Source Group calculated based on interval in request.
+            The interval is a number followed by min, h, d, m, q or y, e.g. 15min. Intervals of minutes and hours start
+            at start_date and their date is the datetime that ends them. The number of intervals is limited by the
+            PLOT_SUMMARY_MAX_BUCKETS setting.
 
         path_params:
             source:
@@ -97,12 +104,17 @@ class SourceGroupSummaryCollection(APIView):
                 return Http400(error_code='plot_source_group_summary_list_003')
             try:
                 interval = search.pop('interval', None)
-                frequency = int(interval[:-1])
-                period = interval[-1]
-            except (TypeError, ValueError):
+                frequency, period = INTERVAL.fullmatch(interval).groups()
+                frequency = int(frequency)
+            except (AttributeError, TypeError):
+                return Http400(error_code='plot_source_group_summary_list_004')
+            if frequency < 1:
                 return Http400(error_code='plot_source_group_summary_list_004')
-            if period.lower() not in ['d', 'm', 'q', 'y']:
+            period = period.lower()
+            if period not in PERIODS:
                 return Http400(error_code='plot_source_group_summary_list_005')
+            if get_bucket_count(start_date, end_date, frequency, period) > settings.PLOT_SUMMARY_MAX_BUCKETS:
+                return Http400(error_code='plot_source_group_summary_list_007')
             accumulating = search.get('accumulating', None)
             if not isinstance(accumulating, bool):
                 return Http400(error_code='plot_source_group_summary_list_006')
@@ -120,6 +132,8 @@ class SourceGroupSummaryCollection(APIView):
                 description__icontains=source,
                 **controller.cleaned_data['search'],
             ).values_list('pk', flat=True)
+            # Evaluate once, the ids are used both to filter the Readings and to order the results
+            sources = list(sources)
 
         with tracer.start_span('creating_response_structure', child_of=request.span):
             content = {
@@ -136,65 +150,95 @@ class SourceGroupSummaryCollection(APIView):
             }
 
         with tracer.start_span('creating_date_list_for_filter', child_of=request.span):
-            date_list = get_date_list(start_date, end_date, frequency, period.lower())
+            calendar = get_bucket_calendar(start_date, end_date, frequency, period)
+
+        with tracer.start_span('get_reading_results_per_range', child_of=request.span) as span:
+            granularity = get_rollup_granularity(calendar)
+            span.set_tag('granularity', granularity)
+            if granularity is not None:
+                readings = ReadingRollup.objects.filter(source_id__in=sources, granularity=granularity)
+                datetime_field = 'bucket_start'
+                min_aggregate = Min('min_value')
+                avg_aggregate = ExpressionWrapper(Sum('sum') / Sum('count'), output_field=DecimalField())
+                max_aggregate = Max('max_value')
+            else:
+                readings = Reading.objects.filter(source_id__in=sources, deleted__isnull=True)
+                datetime_field = 'datetime_taken'
+                min_aggregate = Min('value')
+                avg_aggregate = Avg('value')
+                max_aggregate = Max('value')
+            # Readings, but not Reading Rollups, can be aggregated with NumPy instead of in the database
+            vectorized = granularity is None and settings.PLOT_SUMMARY_AGGREGATION == 'numpy'
 
-        with tracer.start_span('get_reading_results_per_range', child_of=request.span):
-            # Logic not correct - need to think more on loop for item in date list
             interval_values = []
             min_values = []
             avg_values = []
             max_values = []
-            for i in range(0, len(date_list) - 1):
-                if accumulating:
-                    for source in sources:
-                        reading_values = Reading.objects.filter(
-                            datetime_taken__gt=f'{date_list[i]} 23:59:59.999999',
-                            datetime_taken__lte=f'{date_list[i + 1]} 23:59:59.999999',
-                            source_id=source,
-                        ).values_list('value', flat=True)
-                        if len(reading_values) == 0:
-                            content['values'].append(
-                                {'date': date_list[i + 1], 'value': None, 'min_value': None, 'avg_value': None,
-                                 'max_value': None},
-                            )
-                            continue
-
-                        value = max(reading_values)
-                        interval_values.append(value)
+            if accumulating:
+                if vectorized:
+                    results = get_bucket_aggregates_numpy(readings, calendar, 'source_id', value='max')
+                else:
+                    results = get_bucket_aggregates(
+                        readings,
+                        calendar,
+                        'source_id',
+                        datetime_field=datetime_field,
+                        value=max_aggregate,
+                    )
+                source_values = {
+                    (calendar.get_bucket(result['bucket']), result['source_id']): result['value'] for result in results
+                }
+                for i in range(1, len(calendar.dates)):
+                    for source_id in sources:
+                        value = source_values.get((i, source_id), None)
+                        if value is not None:
+                            interval_values.append(value)
                         content['values'].append(
                             {
-                                'date': date_list[i + 1],
+                                'date': calendar.dates[i],
                                 'value': value,
                                 'min_value': None,
                                 'avg_value': None,
                                 'max_value': None,
                             },
                         )
+            else:
+                if vectorized:
+                    results = get_bucket_aggregates_numpy(
+                        readings,
+                        calendar,
+                        min_value='min',
+                        avg_value='avg',
+                        max_value='max',
+                    )
                 else:
-                    reading_values = Reading.objects.filter(
-                        datetime_taken__gt=f'{date_list[i]} 23:59:59.999999',
-                        datetime_taken__lte=f'{date_list[i + 1]} 23:59:59.999999',
-                        source_id__in=sources,
-                    ).values_list('value', flat=True)
-                    if len(reading_values) == 0:
+                    results = get_bucket_aggregates(
+                        readings,
+                        calendar,
+                        datetime_field=datetime_field,
+                        min_value=min_aggregate,
+                        avg_value=avg_aggregate,
+                        max_value=max_aggregate,
+                    )
+                bucket_values = {calendar.get_bucket(result['bucket']): result for result in results}
+                for i in range(1, len(calendar.dates)):
+                    result = bucket_values.get(i, None)
+                    if result is None:
                         content['values'].append(
-                            {'date': date_list[i + 1], 'value': None, 'min_value': None, 'avg_value': None,
+                            {'date': calendar.dates[i], 'value': None, 'min_value': None, 'avg_value': None,
                              'max_value': None},
                         )
                         continue
-                    min_value = min(reading_values)
-                    avg_value = sum(reading_values) / len(reading_values)
-                    max_value = max(reading_values)
-                    min_values.append(min_value)
-                    avg_values.append(avg_value)
-                    max_values.append(max_value)
+                    min_values.append(result['min_value'])
+                    avg_values.append(result['avg_value'])
+                    max_values.append(result['max_value'])
                     content['values'].append(
                         {
-                            'date': date_list[i + 1],
+                            'date': calendar.dates[i],
                             'value': None,
-                            'min_value': min_value,
-                            'avg_value': avg_value,
-                            'max_value': max_value,
+                            'min_value': result['min_value'],
+                            'avg_value': result['avg_value'],
+                            'max_value': result['max_value'],
                         },
                     )
             if accumulating:
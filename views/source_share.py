@@ -20,7 +20,7 @@ from plot.controllers import (
 from plot.models import SourceShare
 from plot.permissions.source_share import Permissions
 from plot.serializers import SourceShareSerializer
-from plot.utils import get_addresses_in_member
+from plot.utils import get_addresses_in_member, get_total_records
 
 __all__ = [
     'SourceShareCollection',
@@ -40,6 +40,10 @@ class SourceShareCollection(APIView):
         description: |
             Retrieve a list of the Source Share records for the requesting User's Member.
 
+            Send the "count" parameter as "estimate" to use the row estimate of the query planner for "total_records"
+            in "_metadata", or as "capped" to stop counting at a threshold, e.g. "10000+". Both modes count exactly
+            below the threshold. Defaults to "exact".
+
         responses:
             200:
                 description: A list of the Source Share records, filtered and ordered by the User
@@ -74,11 +78,14 @@ class SourceShareCollection(APIView):
             except (ValueError, ValidationError):
                 return Http400(error_code='plot_source_share_list_001')
 
-        with tracer.start_span('generating_metadata', child_of=request.span):
+        with tracer.start_span('generating_metadata', child_of=request.span) as span:
             limit = controller.cleaned_data['limit']
             order = controller.cleaned_data['order']
             page = controller.cleaned_data['page']
-            total_records = objs.count()
+            try:
+                total_records = get_total_records(objs, request.GET.get('count', 'exact'), span)
+            except ValueError:
+                return Http400(error_code='plot_source_share_list_002')
             warnings = controller.warnings
             metadata = {
                 'limit': limit,
@@ -91,8 +98,8 @@ class SourceShareCollection(APIView):
 
         # Serializing items and returning response
         with tracer.start_span('serializing_data', child_of=request.span) as span:
-            span.set_tag('num_objects', objs.count())
             data = SourceShareSerializer(instance=objs, many=True).data
+            span.set_tag('num_objects', len(data))
 
         return Response({'content': data, '_metadata': metadata})
 
@@ -161,8 +168,8 @@ class SourceShareResource(APIView):
             except SourceShare.DoesNotExist:
                 return Http404(error_code='plot_source_share_read_001')
 
-        with tracer.start_span('checking_permissions', child_of=request.span):
-            err = Permissions.read(request, obj)
+        with tracer.start_span('checking_permissions', child_of=request.span) as span:
+            err = Permissions.read(request, obj, span)
             if err is not None:
                 return err
 
@@ -3,18 +3,25 @@ Management for Source Summary reports
 This service displays aggregated data from the Readings of a Source. It does not create any records
 """
 # stdlib
+from datetime import datetime, time, timedelta
 from dateutil import parser
 # libs
 from cloudcix_rest.exceptions import Http400, Http404
 from cloudcix_rest.views import APIView
 from django.conf import settings
+from django.db.models import Avg, DecimalField, ExpressionWrapper, Max, Sum
+from django.utils import timezone
 from rest_framework.request import Request
 from rest_framework.response import Response
 # local
+from plot.aggregation import get_bucket_aggregates, get_rollup_granularity
+from plot.aggregation_numpy import get_bucket_aggregates_numpy
+from plot.bucket_calendar import get_bucket_calendar, get_bucket_count, INTERVAL, PERIODS
 from plot.controllers import SourceSummaryListController
-from plot.models import Reading, Source
+from plot.downsampling import downsample_readings
+from plot.models import Reading, ReadingRollup, Source
 from plot.permissions.source_summary import Permissions
-from plot.utils import get_date_list
+from plot.summary_cache import cache_buckets, get_cached_buckets
 
 
 __all__ = [
@@ -31,7 +38,15 @@ class SourceSummaryCollection(APIView):
         """
         summary: Calculate the daily values of Readings for a specified Source for a date range
 
-        description: Summary report of readings for source calculated based on interval in request.
+        description: |
+            Summary report of readings for source calculated based on interval in request. The values of intervals
+            that have ended are cached until a Reading in the interval is created, updated or deleted.
+            The interval is a number followed by min, h, d, m, q or y, e.g. 15min. Intervals of minutes and hours start
+            at start_date and their date is the datetime that ends them. The number of intervals is limited by the
+            PLOT_SUMMARY_MAX_BUCKETS setting.
+            When points is sent instead of interval, the Readings taken from start_date to the end of the day of
+            end_date are downsampled for charts to at most that many Readings with Largest-Triangle-Three-Buckets, and
+            each date is the datetime_taken of a Reading. The total is not calculated.
 
         path_params:
             source_id:
@@ -52,6 +67,9 @@ class SourceSummaryCollection(APIView):
                                 interval:
                                     description: The interval the reading calculations were based on.
                                     type: string
+                                points:
+                                    description: The most Readings requested, when downsampling.
+                                    type: integer
                                 total:
                                     description: The total value of the readings for the specified period.
                                     type: string
@@ -98,14 +116,57 @@ class SourceSummaryCollection(APIView):
                 end_date = parser.parse(search.get('end_date', None))
             except (TypeError, ValueError):
                 return Http400(error_code='plot_source_summary_list_002')
+            points = search.get('points', None)
+            if points is not None:
+                try:
+                    points = int(points)
+                except (TypeError, ValueError):
+                    return Http400(error_code='plot_source_summary_list_006')
+                if not 3 <= points <= settings.PLOT_SUMMARY_MAX_BUCKETS:
+                    return Http400(error_code='plot_source_summary_list_006')
+
+        if points is not None:
+            # Downsampling mode, the Readings in the range are reduced to at most the number of points sent
+            with tracer.start_span('downsampling_readings', child_of=request.span) as span:
+                if timezone.is_naive(start_date):
+                    start_date = timezone.make_aware(start_date)
+                # The range includes the whole of the day of end_date, as the intervals do
+                end = timezone.make_aware(datetime.combine(end_date.date() + timedelta(days=1), time()))
+                selected = downsample_readings(
+                    Reading.objects.filter(source=source, deleted__isnull=True),
+                    start_date,
+                    end,
+                    points,
+                )
+                span.set_tag('num_points', len(selected))
+            content = {
+                'accumulating': source.accumulating,
+                'interval': None,
+                'points': points,
+                'total': None,
+                'source_name': source.description,
+                'unit_name': source.unit.name,
+                'unit_symbol': source.unit.abbreviation,
+                'values': [
+                    {'date': datetime_taken.isoformat(), 'value': value} for datetime_taken, value in selected
+                ],
+            }
+            return Response({'content': content})
+
+        with tracer.start_span('validating_interval', child_of=request.span):
             try:
                 interval = search.get('interval', None)
-                frequency = int(interval[:-1])
-                period = interval[-1]
-            except (TypeError, ValueError):
+                frequency, period = INTERVAL.fullmatch(interval).groups()
+                frequency = int(frequency)
+            except (AttributeError, TypeError):
+                return Http400(error_code='plot_source_summary_list_003')
+            if frequency < 1:
                 return Http400(error_code='plot_source_summary_list_003')
-            if period.lower() not in ['d', 'm', 'q', 'y']:
+            period = period.lower()
+            if period not in PERIODS:
                 return Http400(error_code='plot_source_summary_list_004')
+            if get_bucket_count(start_date, end_date, frequency, period) > settings.PLOT_SUMMARY_MAX_BUCKETS:
+                return Http400(error_code='plot_source_summary_list_005')
 
         with tracer.start_span('creating_response_structure', child_of=request.span):
             content = {
@@ -119,27 +180,61 @@ class SourceSummaryCollection(APIView):
             }
 
         with tracer.start_span('creating_date_list_for_filter', child_of=request.span):
-            date_list = get_date_list(start_date, end_date, frequency, period.lower())
-
-        with tracer.start_span('get_reading_results_per_range', child_of=request.span):
-            i = 0
-            interval_values = []
-            while i < len(date_list) - 1:
-                reading_values = Reading.objects.filter(
-                    datetime_taken__gt=f'{date_list[i]} 23:59:59.999999',
-                    datetime_taken__lte=f'{date_list[i+1]} 23:59:59.999999',
-                    source=source,
-                ).values_list('value', flat=True)
-                i += 1
-                if len(reading_values) == 0:
-                    content['values'].append({'date': date_list[i], 'value': None})
-                    continue
+            calendar = get_bucket_calendar(start_date, end_date, frequency, period)
+
+        with tracer.start_span('get_cached_results_per_range', child_of=request.span) as span:
+            aggregation = 'max' if source.accumulating is True else 'avg'
+            bucket_values, missing = get_cached_buckets(source.pk, aggregation, calendar)
+            span.set_tag('num_cached', len(bucket_values))
+
+        with tracer.start_span('get_reading_results_per_range', child_of=request.span) as span:
+            granularity = get_rollup_granularity(calendar)
+            span.set_tag('granularity', granularity)
+            if granularity is not None:
+                readings = ReadingRollup.objects.filter(source=source, granularity=granularity)
+                datetime_field = 'bucket_start'
+                if source.accumulating is True:
+                    aggregate = Max('max_value')
+                else:
+                    aggregate = ExpressionWrapper(Sum('sum') / Sum('count'), output_field=DecimalField())
+            else:
+                readings = Reading.objects.filter(source=source, deleted__isnull=True)
+                datetime_field = 'datetime_taken'
                 if source.accumulating is True:
-                    value = max(reading_values)
+                    aggregate = Max('value')
+                else:
+                    aggregate = Avg('value')
+
+            # Only the intervals that are open or not cached are calculated
+            uncached = [i for i in range(1, len(calendar.dates)) if i not in bucket_values]
+            span.set_tag('num_calculated', len(uncached))
+            if len(uncached) > 0:
+                boundaries = calendar.boundaries
+                readings = readings.filter(**{
+                    f'{datetime_field}__gte': boundaries[uncached[0] - 1],
+                    f'{datetime_field}__lt': boundaries[uncached[-1]],
+                })
+                if granularity is None and settings.PLOT_SUMMARY_AGGREGATION == 'numpy':
+                    results = get_bucket_aggregates_numpy(readings, calendar, value=aggregation)
                 else:
-                    value = sum(reading_values) / len(reading_values)
-                interval_values.append(value)
-                content['values'].append({'date': date_list[i], 'value': value})
+                    results = get_bucket_aggregates(
+                        readings,
+                        calendar,
+                        datetime_field=datetime_field,
+                        value=aggregate,
+                    )
+                for result in results:
+                    bucket = calendar.get_bucket(result['bucket'])
+                    if bucket not in bucket_values:
+                        bucket_values[bucket] = result['value']
+                cache_buckets(missing, bucket_values)
+
+            interval_values = []
+            for i in range(1, len(calendar.dates)):
+                value = bucket_values.get(i, None)
+                if value is not None:
+                    interval_values.append(value)
+                content['values'].append({'date': calendar.dates[i], 'value': value})
 
             if source.accumulating is True:
                 content['total'] = max(interval_values, default=0)